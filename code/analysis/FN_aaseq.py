@@ -1,11 +1,8 @@
 import os
-import time
 import pandas as pd
-import requests
-from tqdm import tqdm
 
-FIND_URL = "https://rest.kegg.jp/find/genes/{query}"
-AASEQ_URL = "https://rest.kegg.jp/get/{entry}/aaseq"
+from kegg_client import KeggClient
+from sequence_export import export_sequences, pending_items
 
 STATUS_FILE   = "/mnt/NFS/fengch/new/models/paper/gene_essentiality_comparison.xlsx"  
 SHEET_NAME    = 0          
@@ -15,10 +12,11 @@ EXPT_COL      = "experimental_essential"
 
 OUTPUT_FASTA  = "/mnt/NFS/fengch/new/models/paper/FN_kegg.faa"       
 LOG_CSV       = "/mnt/NFS/fengch/PAPER/FN_kegg_log.csv"   
-SLEEP_TIME    = 0.2       
+MAX_WORKERS   = 4
 TIMEOUT       = 30
 RETRIES       = 2
 BACKOFF       = 1.6
+RESUME        = True       # skip genes finished by an earlier, interrupted run
 
 def smart_read_table(path, sheet=None):
     ext = os.path.splitext(path)[1].lower()
@@ -35,56 +33,26 @@ def smart_read_table(path, sheet=None):
         raise ValueError(f"false: {ext}")
 
 
-def http_get(url, timeout=30, retries=2, backoff=1.6):
-    last_err = None
-    for i in range(retries + 1):
-        try:
-            r = requests.get(url, timeout=timeout)
-            if r.status_code == 200 and r.text.strip():
-                return r.text
-            if r.status_code == 404:
-                return None
-            last_err = f"HTTP {r.status_code}"
-        except Exception as e:
-            last_err = str(e)
-        time.sleep(backoff ** i)
-    if "HTTP 404" in str(last_err):
-        return None
-    raise RuntimeError(f"failure: {url} | {last_err}")
-
-
-def kegg_find_genes(cnag):
-    txt = http_get(FIND_URL.format(query=cnag), timeout=TIMEOUT, retries=RETRIES, backoff=BACKOFF)
-    if not txt:
-        return None, []
-    rows = [ln for ln in txt.strip().splitlines() if ln]
-    parsed = []
-    for ln in rows:
-        if "\t" in ln:
-            left, right = ln.split("\t", 1)
-            parsed.append((left.strip(), right.strip()))
-    exact = [p for p in parsed if p[0].split(":")[-1].upper() == cnag.upper()]
-    if exact:
-        return exact[0][0], parsed
-    return parsed[0][0], parsed
-
-
-def kegg_get_aaseq(entry):
-    txt = http_get(AASEQ_URL.format(entry=entry), timeout=TIMEOUT, retries=RETRIES, backoff=BACKOFF)
-    if not txt:
-        return None, None
-    blocks = txt.strip().split("\n>")
-    first = blocks[0] if txt.startswith(">") else ">" + blocks[0]
-    lines = first.strip().splitlines()
-    header = lines[0].lstrip(">").strip()
-    seq = "".join(x.strip() for x in lines[1:])
-    return header, seq
-
-
-def write_fasta_record(fh, header, seq, width=60):
-    fh.write(f">{header}\n")
-    for i in range(0, len(seq), width):
-        fh.write(seq[i:i+width] + "\n")
+def fetch_gene(client, gene):
+    best_entry, cands = client.find_genes(gene)
+    if not best_entry:
+        return {
+            "gene": gene, "status": "NOT_FOUND_IN_FIND",
+            "best_entry": None, "cand_count": 0
+        }, None
+    header, seq = client.get_aaseq(best_entry)
+    if header and seq:
+        return {
+            "gene": gene, "status": "OK",
+            "best_entry": best_entry,
+            "cand_count": len(cands),
+            "length": len(seq)
+        }, (header, seq)
+    return {
+        "gene": gene, "status": "NO_AASEQ",
+        "best_entry": best_entry,
+        "cand_count": len(cands)
+    }, None
 
 
 def main():
@@ -103,41 +71,26 @@ def main():
     print(f"FN: {len(fn_genes)} ")
 
     os.makedirs(os.path.dirname(os.path.abspath(OUTPUT_FASTA)) or ".", exist_ok=True)
-    logs = []
-    ok = 0
-
-    with open(OUTPUT_FASTA, "w", encoding="utf-8") as fw:
-        for gene in tqdm(fn_genes, desc="Fetching KEGG AAseq (FN)"):
-            try:
-                best_entry, cands = kegg_find_genes(gene)
-                if not best_entry:
-                    logs.append({
-                        "gene": gene, "status": "NOT_FOUND_IN_FIND",
-                        "best_entry": None, "cand_count": 0
-                    })
-                else:
-                    header, seq = kegg_get_aaseq(best_entry)
-                    if header and seq:
-                        write_fasta_record(fw, header, seq)
-                        ok += 1
-                        logs.append({
-                            "gene": gene, "status": "OK",
-                            "best_entry": best_entry,
-                            "cand_count": len(cands),
-                            "length": len(seq)
-                        })
-                    else:
-                        logs.append({
-                            "gene": gene, "status": "NO_AASEQ",
-                            "best_entry": best_entry,
-                            "cand_count": len(cands)
-                        })
-            except Exception as e:
-                logs.append({"gene": gene, "status": f"ERROR: {e}"})
-            time.sleep(SLEEP_TIME)
-
-    pd.DataFrame(logs).to_csv(LOG_CSV, index=False)
+    client = KeggClient(max_workers=MAX_WORKERS, timeout=TIMEOUT, retries=RETRIES, backoff=BACKOFF)
+
+    def fetch(gene):
+        try:
+            return fetch_gene(client, gene)
+        except Exception as e:
+            return {"gene": gene, "status": f"ERROR: {e}"}, None
+
+    # resolve entries first so sequences can be fetched ten per request
+    def find(gene):
+        try:
+            return client.find_genes(gene)[0]
+        except Exception:
+            return None
+
+    todo = pending_items(fn_genes, OUTPUT_FASTA) if RESUME else fn_genes
+    client.prefetch([e for e in client.map(find, todo) if e], "aaseq")
 
+    export_sequences(fn_genes, fetch, OUTPUT_FASTA, LOG_CSV, mapper=client.map,
+                     desc="Fetching KEGG AAseq (FN)", resume=RESUME)
 
 if __name__ == "__main__":
     main()
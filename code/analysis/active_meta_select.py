@@ -1,7 +1,8 @@
 import os
 import pandas as pd
-from cobra.io import read_sbml_model
-from cobra.flux_analysis import flux_variability_analysis
+
+from active_set import find_active_reactions
+from model_cache import load_model
 
 MODEL_PATH = "/mnt/NFS/fengch/new/models/paper/merge_after_YPD_heat.xml"
 OUT_DIR = "/mnt/NFS/fengch/new_data/new_results_YPD"
@@ -12,24 +13,16 @@ FVA_PROCESSES = 8
 TOL_ZERO = 1e-9
 
 def main():
-    model = read_sbml_model(MODEL_PATH)
+    model = load_model(MODEL_PATH)
     print(f"{len(model.reactions)} reactions, {len(model.metabolites)} metabolites")
 
-    fva_res = flux_variability_analysis(
+    active_rxns, dead_rxns, stats = find_active_reactions(
         model,
         fraction_of_optimum=FVA_FRACTION,
+        tol=TOL_ZERO,
         processes=FVA_PROCESSES
     )
-
-    fva_res = fva_res.rename(columns=lambda c: "minimum" if c.lower().startswith("min") else
-                             ("maximum" if c.lower().startswith("max") else c))
-
-    dead_rxns = fva_res[
-        (fva_res["minimum"].abs() < TOL_ZERO) &
-        (fva_res["maximum"].abs() < TOL_ZERO)
-    ].index.tolist()
-
-    active_rxns = [r.id for r in model.reactions if r.id not in dead_rxns]
+    print(f"dead reactions: {len(dead_rxns)} ({stats['lp_count']} LPs)")
 
     active_mets = set()
     for rxn_id in active_rxns:
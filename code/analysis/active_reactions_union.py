@@ -3,8 +3,10 @@
 
 import os
 import pandas as pd
-from cobra.io import read_sbml_model
-from cobra.flux_analysis import flux_variability_analysis
+
+from active_set import find_active_reactions
+from fva_cache import cached_fva
+from model_cache import load_model
 
 MODEL_A_PATH = "/mnt/NFS/fengch/new/models/paper/merge_after_YPD_heat.xml"   
 MODEL_B_PATH = "/mnt/NFS/fengch/new/models/paper/merge_after_YPD_heat.xml"  
@@ -14,6 +16,7 @@ OUT_DIR = "/mnt/NFS/fengch/TPM/heat"
 FVA_FRACTION = 0.8
 FVA_PROCESSES = 8
 TOL_ZERO = 1e-9        
+ACTIVE_SET_ONLY = False    # classify without full FVA; the CSVs then carry no min/max
 
 FVA_A_CSV      = os.path.join(OUT_DIR, "fva_heat.csv")
 FVA_B_CSV      = os.path.join(OUT_DIR, "fva_heat.csv")
@@ -21,13 +24,7 @@ ACTIVE_ANY_TXT = os.path.join(OUT_DIR, "active_rxns_union_heat.txt")
 
 
 def run_fva_for_model(model_path, out_csv):
-    model = read_sbml_model(model_path)
-
-    fva_res = flux_variability_analysis(
-        model,
-        fraction_of_optimum=FVA_FRACTION,
-        processes=FVA_PROCESSES
-    ) 
+    model = load_model(model_path)
 
     rxn_ids, rxn_names, lb_list, ub_list = [], [], [], []
     for rxn in model.reactions:
@@ -43,12 +40,28 @@ def run_fva_for_model(model_path, out_csv):
         "UB": ub_list
     }).set_index("ID")
 
-    fva_df = meta_df.join(fva_res, how="left")  # index = ID
-
-    fva_df["is_active"] = (
-        (fva_df["minimum"].abs() > TOL_ZERO) |
-        (fva_df["maximum"].abs() > TOL_ZERO)
-    )
+    if ACTIVE_SET_ONLY:
+        active_ids, _, _ = find_active_reactions(
+            model,
+            fraction_of_optimum=FVA_FRACTION,
+            tol=TOL_ZERO,
+            processes=FVA_PROCESSES
+        )
+        fva_df = meta_df.copy()
+        fva_df["is_active"] = fva_df.index.isin(active_ids)
+    else:
+        fva_res = cached_fva(
+            model,
+            fraction_of_optimum=FVA_FRACTION,
+            processes=FVA_PROCESSES
+        )
+
+        fva_df = meta_df.join(fva_res, how="left")  # index = ID
+
+        fva_df["is_active"] = (
+            (fva_df["minimum"].abs() > TOL_ZERO) |
+            (fva_df["maximum"].abs() > TOL_ZERO)
+        )
 
     num_active = int(fva_df["is_active"].sum())
     print(f"{os.path.basename(model_path)} 中 active reactions: {num_active}")
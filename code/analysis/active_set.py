@@ -0,0 +1,155 @@
+from collections import defaultdict
+
+import numpy as np
+from cobra.util.solver import fix_objective_as_constraint
+from optlang.symbolics import Zero
+
+from fva_cache import FVA_PROCESSES, cached_fva, cached_reactions
+
+TOL_ZERO = 1e-9
+EPSILON = 1e-4         # flux each reaction is pushed towards in the consistency LPs
+MAX_ROUNDS = 10
+SEED = 0
+
+
+def structurally_blocked(model):
+    """Reactions that cannot carry flux in any steady state, found without LPs.
+
+    Repeatedly drops reactions that touch a metabolite nothing else can
+    produce or consume (dead ends), given the current bounds.
+    """
+    alive = {r for r in model.reactions if r.lower_bound < 0 or r.upper_bound > 0}
+    queue = set(alive)
+    while queue:
+        producers, consumers = defaultdict(set), defaultdict(set)
+        for rxn in alive:
+            for met, coeff in rxn.metabolites.items():
+                if rxn.upper_bound > 0:
+                    (producers if coeff > 0 else consumers)[met].add(rxn)
+                if rxn.lower_bound < 0:
+                    (consumers if coeff > 0 else producers)[met].add(rxn)
+        blocked = set()
+        for rxn in queue:
+            for met in rxn.metabolites:
+                if not producers[met] or not consumers[met] or producers[met] | consumers[met] == {rxn}:
+                    blocked.add(rxn)
+                    break
+        alive -= blocked
+        queue = {r for b in blocked for m in b.metabolites for r in m.reactions if r in alive}
+    return [r.id for r in model.reactions if r not in alive]
+
+
+def _fluxes(model, reactions):
+    primal = model.solver.primal_values
+    return np.array([primal[r.id] - primal[r.reverse_id] for r in reactions])
+
+
+def _set_linear_objective(model, coefficients):
+    model.objective = model.problem.Objective(Zero, direction="max", sloppy=True)
+    model.objective.set_linear_coefficients(coefficients)
+
+
+def find_active_reactions(model, fraction_of_optimum=1.0, tol=TOL_ZERO, epsilon=EPSILON,
+                          max_rounds=MAX_ROUNDS, processes=FVA_PROCESSES, seed=SEED):
+    """Split reactions into active and dead as FVA with ``fraction_of_optimum`` would.
+
+    Dead ends are removed structurally, random-weight LPs over all undecided
+    reactions certify most active ones, and a FASTCC-style LP proves the
+    remaining irreversible reactions dead as a group. Only reversible
+    leftovers go through (cached) FVA.
+
+    Returns ``(active_ids, dead_ids, stats)``.
+    """
+    rng = np.random.default_rng(seed)
+    reactions = list(model.reactions)
+    index = {r.id: i for i, r in enumerate(reactions)}
+    lb = np.array([r.lower_bound for r in reactions])
+    ub = np.array([r.upper_bound for r in reactions])
+
+    active = np.zeros(len(reactions), dtype=bool)
+    dead = np.zeros(len(reactions), dtype=bool)
+    dead[[index[r] for r in structurally_blocked(model)]] = True
+    n_structural = int(dead.sum())
+    lp_count = 0
+
+    def certify(fluxes):
+        new = (np.abs(fluxes) > tol) & ~active
+        active[new] = True
+        return int(new.sum())
+
+    with model:
+        fix_objective_as_constraint(model, fraction=fraction_of_optimum)
+        model.slim_optimize()
+        lp_count += 2
+        if model.solver.status == "optimal":
+            certify(_fluxes(model, reactions))
+
+        for _ in range(max_rounds):
+            found = 0
+            for sign, can_move in ((1, ub > 0), (-1, lb < 0)):
+                todo = np.flatnonzero(~dead & ~active & can_move)
+                if len(todo) == 0:
+                    continue
+                weights = sign * rng.uniform(0.5, 1.5, len(todo))
+                coefficients = {}
+                for i, w in zip(todo, weights):
+                    coefficients[reactions[i].forward_variable] = w
+                    coefficients[reactions[i].reverse_variable] = -w
+                _set_linear_objective(model, coefficients)
+                model.slim_optimize()
+                lp_count += 1
+                if model.solver.status == "optimal":
+                    found += certify(_fluxes(model, reactions))
+            if not found:
+                break
+
+        # irreversible leftovers: maximize sum(z_r), 0 <= z_r <= epsilon,
+        # z_r <= |v_r|; an optimum of zero proves all of them dead at once
+        irreversible = np.flatnonzero(~dead & ~active & ((lb >= 0) | (ub <= 0)))
+        if len(irreversible):
+            prob = model.problem
+            z_vars, constraints = {}, []
+            for i in irreversible:
+                rxn = reactions[i]
+                sign = 1 if lb[i] >= 0 else -1
+                z = prob.Variable(f"active_set_z_{rxn.id}", lb=0, ub=epsilon)
+                z_vars[i] = z
+                constraints.append(prob.Constraint(sign * rxn.flux_expression - z, lb=0,
+                                                   name=f"active_set_c_{rxn.id}"))
+            model.add_cons_vars(list(z_vars.values()) + constraints, sloppy=True)
+            while True:
+                todo = [i for i in irreversible if not active[i]]
+                _set_linear_objective(model, {z_vars[i]: 1 for i in todo})
+                value = model.slim_optimize()
+                lp_count += 1
+                if model.solver.status != "optimal":
+                    break
+                if value <= tol:
+                    dead[todo] = True
+                    break
+                if not certify(_fluxes(model, reactions)):
+                    break
+
+    remaining = [reactions[i].id for i in np.flatnonzero(~dead & ~active)]
+    n_cached = 0
+    if remaining:
+        # only the reactions cached_fva has to solve count as LPs
+        n_cached = len(cached_reactions(model, fraction_of_optimum) & set(remaining))
+        fva = cached_fva(model, remaining, fraction_of_optimum=fraction_of_optimum,
+                         processes=processes)
+        fva_active = (fva["minimum"].abs() > tol) | (fva["maximum"].abs() > tol)
+        for rxn_id, is_active in fva_active.items():
+            active[index[rxn_id]] = is_active
+        if n_cached < len(remaining):
+            lp_count += 1 + 2 * (len(remaining) - n_cached)
+
+    stats = {
+        "reactions": len(reactions),
+        "structurally_blocked": n_structural,
+        "fva_reactions": len(remaining),
+        "fva_cached": n_cached,
+        "lp_count": lp_count,
+    }
+    active_ids = [r.id for r, a in zip(reactions, active) if a]
+    dead_ids = [r.id for r, a in zip(reactions, active) if not a]
+    return active_ids, dead_ids, stats
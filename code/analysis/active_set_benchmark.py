@@ -0,0 +1,49 @@
+import os
+import time
+
+from cobra.flux_analysis import flux_variability_analysis
+
+from active_set import find_active_reactions
+from model_cache import load_model
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "model")
+# the REMI_*.mat files hold TFA/MILP problems rather than cobra models and
+# are not covered here
+MODEL_PATHS = [os.path.join(MODEL_DIR, name) for name in ["iCNG99.mat", "GIMME_gal.xml", "GIMME_glu.xml"]]
+
+FVA_FRACTION = 0.99
+FVA_PROCESSES = 1
+TOL_ZERO = 1e-9
+
+
+def main():
+    for path in MODEL_PATHS:
+        name = os.path.basename(path)
+        try:
+            model = load_model(path)
+        except Exception as e:
+            print(f"{name}: skipped, cannot be loaded ({type(e).__name__})")
+            continue
+
+        start = time.perf_counter()
+        fva_res = flux_variability_analysis(model, fraction_of_optimum=FVA_FRACTION,
+                                            processes=FVA_PROCESSES)
+        fva_time = time.perf_counter() - start
+        fva_dead = set(fva_res[(fva_res["minimum"].abs() < TOL_ZERO) &
+                               (fva_res["maximum"].abs() < TOL_ZERO)].index)
+
+        start = time.perf_counter()
+        active, dead, stats = find_active_reactions(model, fraction_of_optimum=FVA_FRACTION,
+                                                    tol=TOL_ZERO, processes=FVA_PROCESSES)
+        fast_time = time.perf_counter() - start
+
+        print(f"{name}: {len(model.reactions)} reactions, {len(dead)} dead, "
+              f"same partition as FVA: {set(dead) == fva_dead}")
+        print(f"  full FVA:   {1 + 2 * len(model.reactions)} LPs, {fva_time:.1f} s")
+        print(f"  active set: {stats['lp_count']} LPs, {fast_time:.1f} s "
+              f"({stats['structurally_blocked']} blocked structurally, "
+              f"{stats['fva_reactions']} left to FVA, {stats['fva_cached']} of them cached)")
+
+
+if __name__ == "__main__":
+    main()
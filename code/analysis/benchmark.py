@@ -0,0 +1,325 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.join(HERE, "..", "..")
+sys.path.insert(0, os.path.join(REPO, "code", "construction"))
+
+MODEL_PATH = os.path.join(REPO, "model", "iCNG99.mat")
+MERLIN_PATH = os.path.join(REPO, "data", "construction", "Merlin_model.xml")
+FLUXFOLD_TABLES = sorted(glob.glob(os.path.join(REPO, "data", "analysis", "fluxfold_raw_*.xlsx")))
+REMI_RESULTS = sorted(glob.glob(os.path.join(REPO, "model", "REMI_*.mat")))
+
+REPEAT = 3
+N_SAMPLES = 6           # columns of the synthetic gene table for the GPR mapping
+SEED = 0
+REGRESSION = 1.25       # slower than the baseline by this factor is reported as a regression
+
+
+class Context:
+    """Inputs shared between benchmarks, loaded once outside the timed code."""
+
+    def __init__(self):
+        self._cache = {}
+        self._tmp = []
+
+    def get(self, key, load):
+        if key not in self._cache:
+            self._cache[key] = load()
+        return self._cache[key]
+
+    def model(self):
+        from model_cache import read_model
+        # a fresh copy, so benchmarks that touch bounds cannot leak into others
+        return self.get("iCNG99", lambda: read_model(MODEL_PATH)).copy()
+
+    def merlin(self):
+        return self.get("merlin", read_merlin)
+
+    def tempdir(self):
+        """A scratch directory removed by :meth:`cleanup` once the benchmark is measured."""
+        tmp = tempfile.TemporaryDirectory(prefix="icng99-bench-")
+        self._tmp.append(tmp)
+        return tmp.name
+
+    def cleanup(self):
+        while self._tmp:
+            self._tmp.pop().cleanup()
+
+
+def read_merlin():
+    # the Merlin export carries an empty <fbc:fluxObjective/>, which cobra
+    # refuses; the draft has no objective anyway
+    from cobra.io import read_sbml_model
+    with open(MERLIN_PATH, encoding="utf-8") as fh:
+        return read_sbml_model(fh.read().replace("<fbc:fluxObjective/>", ""))
+
+
+# each benchmark takes the context, does its untimed setup and returns
+# the callable to time; the callable's return value (a dict) is recorded
+
+def bench_load_mat(ctx):
+    from model_cache import read_model
+    return lambda: {"reactions": len(read_model(MODEL_PATH).reactions)}
+
+
+def bench_load_cached(ctx):
+    from model_cache import load_model
+    cache_dir = ctx.tempdir()
+    load_model(MODEL_PATH, cache_dir=cache_dir)    # fill the pickle cache
+    return lambda: {"reactions": len(load_model(MODEL_PATH, cache_dir=cache_dir).reactions)}
+
+
+def bench_load_store(ctx):
+    from model_store import load_store, save_store
+    path = os.path.join(ctx.tempdir(), "store")
+    save_store(ctx.model(), path)
+    return lambda: {"reactions": load_store(path).S.shape[1]}
+
+
+def bench_load_merlin(ctx):
+    return lambda: {"reactions": len(read_merlin().reactions)}
+
+
+def bench_optimize(ctx):
+    model = ctx.model()
+
+    def run():
+        solution = model.optimize()
+        return {"objective": solution.objective_value}
+    return run
+
+
+def bench_fva(ctx):
+    from cobra.flux_analysis import flux_variability_analysis
+    model = ctx.model()
+
+    def run():
+        res = flux_variability_analysis(model, fraction_of_optimum=1.0, processes=1)
+        return {"reactions": len(res)}
+    return run
+
+
+def bench_gene_essentiality(ctx):
+    from knockout import gene_essentiality
+    model = ctx.model()
+
+    def run():
+        res = gene_essentiality(model)
+        essential = int((res["Knockout Objective Value"].fillna(0) < 1e-6).sum())
+        return {"genes": len(res), "essential": essential}
+    return run
+
+
+def bench_gpr_mapping(ctx):
+    from gpr import CompiledGPR, split_gpr
+    model = ctx.model()
+    rules = [r.gene_reaction_rule or None for r in model.reactions]
+    genes = [g.id for g in model.genes]
+    X = np.random.default_rng(SEED).gamma(1.0, 10.0, (len(genes), N_SAMPLES))
+
+    def run():
+        values = CompiledGPR([split_gpr(rule) for rule in rules], genes).evaluate(X)
+        return {"reactions": values.shape[0], "samples": values.shape[1]}
+    return run
+
+
+def bench_flux_fold(ctx):
+    from flux_fold import classify_directions, geometric_mean_consistent
+    tables = [pd.read_excel(path) for path in FLUXFOLD_TABLES]
+    # blank cells in the exported sheets come back as ''
+    folds = [df[df.columns.difference(["ID"])].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+             for df in tables]
+
+    def run():
+        counts = {}
+        for fold in folds:
+            direction = classify_directions(fold)
+            geometric_mean_consistent(fold, direction)
+            for label in ("up", "down", "no"):
+                counts[label] = counts.get(label, 0) + int((direction == label).sum())
+        return dict(counts, tables=len(folds), rows=sum(len(f) for f in folds))
+    return run
+
+
+def bench_flux_fold_table(ctx):
+    # flux_fold.py end to end minus the file I/O: fold table from the REMI
+    # solutions, then directions and consistent geometric means
+    from flux_fold import classify_directions, fold_table, geometric_mean_consistent
+    from remi_loader import load_remi_solutions
+    names = [r.id for r in ctx.model().reactions]
+    results = []
+    for path in REMI_RESULTS:
+        try:
+            results.append(load_remi_solutions(path))
+        except ValueError as e:     # REMI_heat_39vs30.mat is a placeholder
+            print(f"skipping {os.path.basename(path)}: {e}")
+
+    def run():
+        rows = up = 0
+        for solutions in results:
+            df = fold_table(names, solutions)
+            fold = df[df.columns.difference(["ID"])].to_numpy(dtype=float)
+            direction = classify_directions(fold)
+            geometric_mean_consistent(fold, direction)
+            rows += len(df)
+            up += int((direction == "up").sum())
+        return {"results": len(results), "rows": rows, "up": up}
+    return run
+
+
+def bench_balance(ctx):
+    from balance_check import balance_report
+    models = {"iCNG99": ctx.model(), "Merlin": ctx.merlin()}
+
+    def run():
+        info = {}
+        for name, model in models.items():
+            atom_df, charge_df = balance_report(model)
+            info[f"{name}_atom_unbalanced"] = len(atom_df)
+            info[f"{name}_charge_unbalanced"] = len(charge_df)
+        return info
+    return run
+
+
+BENCHMARKS = {
+    "load_mat": bench_load_mat,
+    "load_cached": bench_load_cached,
+    "load_store": bench_load_store,
+    "load_merlin": bench_load_merlin,
+    "optimize": bench_optimize,
+    "fva": bench_fva,
+    "gene_essentiality": bench_gene_essentiality,
+    "gpr_mapping": bench_gpr_mapping,
+    "flux_fold": bench_flux_fold,
+    "flux_fold_table": bench_flux_fold_table,
+    "balance": bench_balance,
+}
+SLOW = {"fva", "gene_essentiality"}     # timed once regardless of --repeat
+
+
+def _max_rss_mb():
+    # kilobytes on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1 << 20) if sys.platform == "darwin" else rss / 1024
+
+
+def measure(run, repeat=REPEAT, memory=True):
+    """Timings of ``repeat`` untraced runs, plus the tracemalloc peak of one more traced run.
+
+    The peak covers Python and NumPy allocations; memory the LP solver
+    allocates in C is only visible in the process-wide ``max_rss_mb``.
+    """
+    times, info = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        info = run()
+        times.append(time.perf_counter() - start)
+    result = {"seconds": times, "best": min(times), "median": statistics.median(times), "info": info}
+    if memory:
+        tracemalloc.start()
+        try:
+            run()
+            result["peak_mb"] = tracemalloc.get_traced_memory()[1] / (1 << 20)
+        finally:
+            tracemalloc.stop()
+    result["max_rss_mb"] = _max_rss_mb()
+    return result
+
+
+def environment():
+    import cobra
+
+    try:
+        commit = subprocess.run(["git", "-C", REPO, "rev-parse", "--short", "HEAD"], stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, universal_newlines=True).stdout.strip()
+    except OSError:
+        commit = ""
+    model_solver = None
+    try:
+        from cobra import Configuration
+        model_solver = Configuration().solver.__name__.rsplit(".", 1)[-1]
+    except Exception:
+        pass
+    return {
+        "commit": commit,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "cobra": cobra.__version__,
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "solver": model_solver,
+    }
+
+
+def run_suite(names=None, repeat=REPEAT, memory=True):
+    ctx = Context()
+    results = {}
+    for name in names or BENCHMARKS:
+        try:
+            run = BENCHMARKS[name](ctx)
+            results[name] = measure(run, 1 if name in SLOW else repeat, memory and name not in SLOW)
+        finally:
+            ctx.cleanup()
+        r = results[name]
+        peak = f", peak {r['peak_mb']:.1f} MB" if "peak_mb" in r else ""
+        print(f"{name}: {r['best']:.3f} s best of {len(r['seconds'])}{peak}", flush=True)
+    return {"environment": environment(), "results": results}
+
+
+def compare(current, baseline, threshold=REGRESSION):
+    """Names of benchmarks at least ``threshold`` times slower than in ``baseline``."""
+    slower = []
+    for name, r in current["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if not old:
+            continue
+        ratio = r["best"] / old["best"] if old["best"] > 0 else float("inf")
+        print(f"{name}: {old['best']:.3f} s -> {r['best']:.3f} s ({ratio:.2f}x)")
+        if ratio >= threshold:
+            slower.append(name)
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the model-analysis hot paths on the bundled models.")
+    parser.add_argument("names", nargs="*", metavar="name",
+                        help=f"benchmarks to run (default all): {', '.join(BENCHMARKS)}")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced run for peak memory")
+    parser.add_argument("--out", help="write the results as JSON here")
+    parser.add_argument("--baseline", help="JSON from an earlier run to compare against")
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    report = run_suite(args.names or None, repeat=args.repeat, memory=not args.no_memory)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            slower = compare(report, json.load(fh))
+        if slower:
+            print(f"regressions: {', '.join(slower)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
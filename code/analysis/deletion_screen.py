@@ -0,0 +1,74 @@
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+from knockout import optimize_wild_type, screen_knockouts
+from model_cache import load_model
+
+PROCESSES = 8
+CHUNK_SIZE = 64
+
+_worker = {}
+
+
+def _prepare_model(path, objective=None):
+    model = load_model(path)
+    if objective is not None:
+        model.objective = objective
+    return model
+
+
+def _init_worker(path, objective):
+    model = _prepare_model(path, objective)
+    _worker["model"] = model
+    _worker["wild_type"] = optimize_wild_type(model)
+
+
+def _screen_chunk(args):
+    kind, chunk = args
+    return screen_knockouts(_worker["model"], chunk, kind=kind, wild_type=_worker["wild_type"])
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def iter_deletion_screen(model_path, knockouts, kind="gene", objective=None,
+                         processes=PROCESSES, chunk_size=CHUNK_SIZE):
+    """Yield ``(knockout, objective value)`` pairs in input order.
+
+    Every worker process loads ``model_path`` once and keeps its LP for all
+    the chunks it is handed; results stream back as chunks complete.
+    """
+    tasks = [(kind, chunk) for chunk in _chunks(list(knockouts), chunk_size)]
+    if processes is None or processes <= 1:
+        _init_worker(model_path, objective)
+        for (_, chunk), values in zip(tasks, map(_screen_chunk, tasks)):
+            yield from zip(chunk, values)
+        return
+
+    processes = min(processes, max(1, len(tasks)))
+    with Pool(processes, initializer=_init_worker, initargs=(model_path, objective)) as pool:
+        for (_, chunk), values in zip(tasks, pool.imap(_screen_chunk, tasks)):
+            yield from zip(chunk, values)
+
+
+def deletion_screen(model_path, knockouts=None, kind="gene", objective=None,
+                    processes=PROCESSES, chunk_size=CHUNK_SIZE):
+    if knockouts is None:
+        model = _prepare_model(model_path)
+        items = model.genes if kind == "gene" else model.reactions
+        knockouts = [x.id for x in items]
+    knockouts = list(knockouts)
+
+    values = np.full(len(knockouts), np.nan)
+    for i, (_, value) in enumerate(iter_deletion_screen(
+            model_path, knockouts, kind=kind, objective=objective,
+            processes=processes, chunk_size=chunk_size)):
+        values[i] = value
+
+    label = "Gene" if kind == "gene" else "Reaction"
+    ids = [k if isinstance(k, str) else "+".join(k) for k in knockouts]
+    return pd.DataFrame({label: ids, "Knockout Objective Value": values})
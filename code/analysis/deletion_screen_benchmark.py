@@ -0,0 +1,49 @@
+import os
+import time
+
+import numpy as np
+
+from deletion_screen import deletion_screen
+from model_cache import load_model
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "model", "iCNG99.mat")
+
+N_GENES_SERIAL = 100     # the copy-per-gene loop is slow, time it on a subset
+PROCESS_COUNTS = [1, 2, 4, 8]
+CHUNK_SIZE = 64
+
+
+def serial_loop(model, gene_ids):
+    # the loop essential_genes.py used to run
+    values = []
+    for gene_id in gene_ids:
+        knockout_model = model.copy()
+        knockout_model.genes.get_by_id(gene_id).knock_out()
+        model.slim_optimize()
+        values.append(knockout_model.slim_optimize())
+    return np.array(values)
+
+
+def main():
+    model = load_model(MODEL_PATH)
+    gene_ids = [g.id for g in model.genes]
+    print(f"{len(gene_ids)} genes, {len(model.reactions)} reactions")
+
+    subset = gene_ids[:N_GENES_SERIAL]
+    start = time.perf_counter()
+    reference = serial_loop(model, subset)
+    elapsed = time.perf_counter() - start
+    print(f"serial loop: {len(subset) / elapsed:.1f} genes/s ({len(subset)} genes, {elapsed:.1f} s)")
+
+    for processes in PROCESS_COUNTS:
+        start = time.perf_counter()
+        res = deletion_screen(MODEL_PATH, gene_ids, processes=processes, chunk_size=CHUNK_SIZE)
+        elapsed = time.perf_counter() - start
+        values = res["Knockout Objective Value"].to_numpy()[:len(subset)]
+        ok = np.allclose(values, reference, atol=1e-6, equal_nan=True)
+        print(f"processes={processes}: {len(gene_ids) / elapsed:.1f} genes/s "
+              f"({elapsed:.1f} s incl. model load, matches serial: {ok})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
-import cobra
-import pandas as pd
+from knockout import gene_essentiality
+from model_cache import load_model
 
-model = cobra.io.read_sbml_model("/mnt/NFS/fengch/TPM/drug/Gal_GIMME.xml")
+model = load_model("/mnt/NFS/fengch/TPM/drug/Gal_GIMME.xml")
 # reactions_to_modify = {
     #"EX_003": {"lower_bound": -1000, "upper_bound": 1000}, 
     #"EX_111": {"lower_bound": -1000, "upper_bound": 1000},
@@ -35,25 +35,7 @@ model = cobra.io.read_sbml_model("/mnt/NFS/fengch/TPM/drug/Gal_GIMME.xml")
 new_objective_reaction_id = "biomass1" 
 model.objective = new_objective_reaction_id
 
-gene_knockout_results = pd.DataFrame(columns=["Gene", "Wild-type Objective Value", "Knockout Objective Value"])
-
-for gene in model.genes:
-    gene_id = gene.id
-
-    knockout_model = model.copy()
-    knockout_model.genes.get_by_id(gene_id).knock_out()
-
-    wildtype_solution = model.slim_optimize()
-    knockout_solution = knockout_model.slim_optimize()
-
-    gene_knockout_results = gene_knockout_results.append({"Gene": gene_id,
-                                                          "Wild-type Objective Value": wildtype_solution,
-                                                          "Knockout Objective Value": knockout_solution},
-                                                         ignore_index=True)
-
-gene_knockout_results["Objective Value Change"] = gene_knockout_results["Wild-type Objective Value"] - \
-                                                  gene_knockout_results["Knockout Objective Value"]
-gene_knockout_results = gene_knockout_results.sort_values(by="Objective Value Change", ascending=False)
+gene_knockout_results = gene_essentiality(model)
 
 gene_knockout_results.to_csv("/mnt/NFS/fengch/TPM/drug/knock_Gal.csv", index=False)
 
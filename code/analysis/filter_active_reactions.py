@@ -1,51 +1,39 @@
 import os
 import numpy as np
 import pandas as pd
-from scipy.stats import ttest_ind
-
-def export_up_down_logFC_with_padj(
-    in_file: str,
-    out_up_xlsx: str,
-    out_down_xlsx: str,
-    lfc_threshold: float = 0.858,
-    padj_threshold: float = 0.05,
-    pseudocount: float = 1e-3,
-    sheet_name = 0
-):
-
-    ext = os.path.splitext(in_file)[1].lower()
-    if ext in [".xlsx", ".xls"]:
-        df = pd.read_excel(in_file, sheet_name=sheet_name)
-    else:
-        sep = "\t" if ext in [".tsv", ".txt"] else ","
-        df = pd.read_csv(in_file, sep=sep)
-
-    if df.shape[1] < 5:
-        raise ValueError("Need at least 1 ID column + >=4 sample columns (>=2 control and >=2 treatment).")
-
-    reaction = df.iloc[:, 0].astype(str)
-
-    X = df.iloc[:, 1:].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
-    n_samples = X.shape[1]
-    if n_samples % 2 != 0:
-        raise ValueError(f"Sample columns must be even (split half/half). Got {n_samples} sample columns.")
-
-    mid = n_samples // 2
-    control = X[:, :mid]
-    treat = X[:, mid:]
-
-    c_mean = np.nanmean(control, axis=1)
-    t_mean = np.nanmean(treat, axis=1)
-    log2fc = np.log2((t_mean + pseudocount) / (c_mean + pseudocount))
-
-    control_log = np.log2(control + pseudocount)
-    treat_log = np.log2(treat + pseudocount)
-
-    pvals = np.array([
-        ttest_ind(treat_log[i, :], control_log[i, :], equal_var=False, nan_policy="omit").pvalue
-        for i in range(X.shape[0])
-    ], dtype=float)
-
+from scipy.stats import t as t_dist
+
+from table_io import read_table, write_table
+
+def welch_ttest(a: np.ndarray, b: np.ndarray):
+    """Row-wise Welch t-test of ``a`` against ``b``, NaNs omitted.
+
+    Same statistic and two-sided p-value as
+    ``ttest_ind(a[i], b[i], equal_var=False, nan_policy="omit")`` for every
+    row ``i``, computed for all rows at once.
+    """
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    na = np.sum(~np.isnan(a), axis=1)
+    nb = np.sum(~np.isnan(b), axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ma = np.nansum(a, axis=1) / na
+        mb = np.nansum(b, axis=1) / nb
+        va = np.nansum((a - ma[:, None]) ** 2, axis=1) / (na - 1)
+        vb = np.nansum((b - mb[:, None]) ** 2, axis=1) / (nb - 1)
+        vna = va / na
+        vnb = vb / nb
+        dof = (vna + vnb) ** 2 / (vna ** 2 / (na - 1) + vnb ** 2 / (nb - 1))
+        dof = np.where(np.isnan(dof), 1, dof)
+        t = (ma - mb) / np.sqrt(vna + vnb)
+        p = 2 * t_dist.sf(np.abs(t), dof)
+    too_small = (na < 2) | (nb < 2)
+    t[too_small] = np.nan
+    p[too_small] = np.nan
+    return t, p
+
+
+def bh_adjust(pvals: np.ndarray) -> np.ndarray:
     ok = np.isfinite(pvals)
     padj = np.full_like(pvals, np.nan, dtype=float)
 
@@ -61,32 +49,115 @@ def export_up_down_logFC_with_padj(
         padj_ok = np.empty_like(q)
         padj_ok[order] = q
         padj[ok] = padj_ok
+    return padj
 
-    res = pd.DataFrame({
-        "reaction": reaction,
-        "value": log2fc,
-        "padj": padj
-    }).dropna(subset=["reaction", "value", "padj"])
 
-    res = res[res["padj"] <= float(padj_threshold)]
+def _group_path(path: str, group, n_groups: int) -> str:
+    if n_groups == 1:
+        return path
+    if "{group}" in path:
+        return path.format(group=group)
+    root, ext = os.path.splitext(path)
+    return f"{root}_{group}{ext}"
 
-    up = res[res["value"] >= float(lfc_threshold)].sort_values("value", ascending=False)
-    down = res[res["value"] <= -float(lfc_threshold)].sort_values("value", ascending=True)
 
-    up.to_excel(out_up_xlsx, index=False)
-    down.to_excel(out_down_xlsx, index=False)
+def export_up_down_logFC_with_padj(
+    in_file: str,
+    out_up_xlsx: str,
+    out_down_xlsx: str,
+    lfc_threshold: float = 0.858,
+    padj_threshold: float = 0.05,
+    pseudocount: float = 1e-3,
+    sheet_name = 0,
+    groups = None,
+    control = None,
+    excel = False
+):
+    """Write up/down reaction tables for each treatment group against ``control``.
+
+    ``groups`` gives one label per sample column; by default the first
+    half of the columns is the control and the second half the treatment.
+    With several treatment groups the output paths are formatted with
+    ``{group}`` (or get ``_<group>`` appended) and a dict of counts per
+    group is returned. Tables are written in the format of the output
+    extension; ``excel`` adds an .xlsx copy of each.
+    """
 
-    print(f"Filtered Up-regulated reactions: {up.shape[0]}")
-    print(f"Filtered Down-regulated reactions: {down.shape[0]}")
+    df = read_table(in_file, sheet_name=sheet_name)
 
-    return up.shape[0], down.shape[0]
+    reaction = df.iloc[:, 0].astype(str)
+
+    X = df.iloc[:, 1:].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    n_samples = X.shape[1]
 
+    if groups is None:
+        if df.shape[1] < 5:
+            raise ValueError("Need at least 1 ID column + >=4 sample columns (>=2 control and >=2 treatment).")
+        if n_samples % 2 != 0:
+            raise ValueError(f"Sample columns must be even (split half/half). Got {n_samples} sample columns.")
+        mid = n_samples // 2
+        groups = ["control"] * mid + ["treatment"] * mid
+        control = "control"
+
+    groups = np.asarray(list(groups), dtype=object)
+    if groups.size != n_samples:
+        raise ValueError(f"Got {groups.size} group labels for {n_samples} sample columns.")
+    labels = list(dict.fromkeys(groups))
+    if control is None:
+        control = labels[0]
+    if control not in labels:
+        raise ValueError(f"Control group {control!r} not among the group labels {labels}.")
+    treatments = [g for g in labels if g != control]
+    if not treatments:
+        raise ValueError("Need at least one treatment group besides the control.")
+    for g in labels:
+        if np.sum(groups == g) < 2:
+            raise ValueError(f"Group {g!r} needs >=2 sample columns.")
+
+    control_X = X[:, groups == control]
+    c_mean = np.nanmean(control_X, axis=1)
+    control_log = np.log2(control_X + pseudocount)
+
+    counts = {}
+    for group in treatments:
+        treat = X[:, groups == group]
+
+        t_mean = np.nanmean(treat, axis=1)
+        log2fc = np.log2((t_mean + pseudocount) / (c_mean + pseudocount))
+
+        treat_log = np.log2(treat + pseudocount)
+        _, pvals = welch_ttest(treat_log, control_log)
+        padj = bh_adjust(pvals)
+
+        res = pd.DataFrame({
+            "reaction": reaction,
+            "value": log2fc,
+            "padj": padj
+        }).dropna(subset=["reaction", "value", "padj"])
+
+        res = res[res["padj"] <= float(padj_threshold)]
+
+        up = res[res["value"] >= float(lfc_threshold)].sort_values("value", ascending=False)
+        down = res[res["value"] <= -float(lfc_threshold)].sort_values("value", ascending=True)
+
+        write_table(up, _group_path(out_up_xlsx, group, len(treatments)), excel=excel)
+        write_table(down, _group_path(out_down_xlsx, group, len(treatments)), excel=excel)
+
+        if len(treatments) > 1:
+            print(f"[{group} vs {control}]")
+        print(f"Filtered Up-regulated reactions: {up.shape[0]}")
+        print(f"Filtered Down-regulated reactions: {down.shape[0]}")
+        counts[group] = (up.shape[0], down.shape[0])
+
+    if len(treatments) == 1:
+        return counts[treatments[0]]
+    return counts
 
 if __name__ == "__main__":
     export_up_down_logFC_with_padj(
-        in_file="/mnt/NFS/fengch/TPM/vivo/vivo_reactions.xlsx",    
-        out_up_xlsx="/mnt/NFS/fengch/TPM/vivo/vivo585_up.xlsx",
-        out_down_xlsx="/mnt/NFS/fengch/TPM/vivo/vivo585_down.xlsx",
+        in_file="/mnt/NFS/fengch/TPM/vivo/vivo_reactions",
+        out_up_xlsx="/mnt/NFS/fengch/TPM/vivo/vivo585_up.parquet",
+        out_down_xlsx="/mnt/NFS/fengch/TPM/vivo/vivo585_down.parquet",
         lfc_threshold=0.585,
         padj_threshold=0.05,
         pseudocount=1e-3,
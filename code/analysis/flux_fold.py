@@ -2,111 +2,123 @@ import pandas as pd
 import numpy as np
 import os
 
-names_path = "/mnt/NFS/fengch/TPM/heat/reference_heat.xlsx"  
-var_path = "/mnt/NFS/fengch/TPM/heat/heat4_flux/sol.xlsx"  
-output_dir = "/mnt/NFS/fengch/TPM/heat/heat4_flux"
+from remi_loader import RemiSolutions, load_remi_solutions
+from table_io import read_table, write_table
 
-threshold_ratio = 0.8   
-tolerance = 1e-6       
-use_stable_mode = True  
-
-os.makedirs(output_dir, exist_ok=True)
-
-names_df = pd.read_excel(names_path)
-var_df = pd.read_excel(var_path)
-
-names_col = [c for c in names_df.columns if 'name' in c.lower() or 'id' in c.lower()][0]
-data_cols = [col for col in var_df.columns if col != 'VAR_NAMES']
-result_df = pd.DataFrame(columns=['ID'] + [f'{col}_fold' for col in data_cols])
-
-for name in names_df[names_col]:
-    name = str(name).strip()
-    nf_name = f'NF_{name}'
-    perturb_name = f'PERTURB_NF_{name}'
-
-    nf_row = var_df[var_df['VAR_NAMES'].str.strip().str.upper() == nf_name.upper()]
-    perturb_row = var_df[var_df['VAR_NAMES'].str.strip().str.upper() == perturb_name.upper()]
-
-    if not nf_row.empty and not perturb_row.empty:
-        row_dict = {'ID': name}
-        for col in data_cols:
-            nf_val = nf_row[col].values[0]
-            pert_val = perturb_row[col].values[0]
-            if nf_val == 0 and pert_val == 0:
-                row_dict[f'{col}_fold'] = np.nan   
-            elif nf_val == 0 and pert_val > 0:
-                row_dict[f'{col}_fold'] = np.inf   
-            elif nf_val > 0 and pert_val == 0:
-                row_dict[f'{col}_fold'] = 0.0      
-            else:
-                row_dict[f'{col}_fold'] = pert_val / nf_val
-
-        result_df = pd.concat([result_df, pd.DataFrame([row_dict])], ignore_index=True)
-
-fold_file = os.path.join(output_dir, "fluxfold_raw.xlsx")
-result_df.to_excel(fold_file, index=False)
-
-cols_wo_id = result_df.columns.difference(['ID'])
-
-def classify_direction(row):
-    vals = row[cols_wo_id].replace([np.inf, -np.inf], np.nan)
-
-    if use_stable_mode:
-        total = len(vals)
-        valid_vals = vals[vals > 0].dropna()
-    else:
-        valid_vals = vals[vals > 0].dropna()
-        total = len(valid_vals)
-
-    if total == 0 or len(valid_vals) == 0:
-        return None
-
-    ups = np.sum(valid_vals > 1 + tolerance)
-    downs = np.sum(valid_vals < 1 - tolerance)
-    equals = np.sum(np.isclose(valid_vals, 1.0, atol=tolerance))
-
-    if ups / total >= threshold_ratio:
-        return "up"
-    elif downs / total >= threshold_ratio:
-        return "down"
-    elif equals / total >= threshold_ratio:
-        return "no"
-    else:
-        return None
-
-result_df["Direction"] = result_df.apply(classify_direction, axis=1)
-
-df_up = result_df[result_df["Direction"] == "up"].copy()
-df_down = result_df[result_df["Direction"] == "down"].copy()
-df_no = result_df[result_df["Direction"] == "no"].copy()
-
-def geometric_mean_consistent(row, direction):
-    vals = np.array(row.replace([np.inf, -np.inf], np.nan).dropna())
-    vals = vals[vals > 0]
-    if len(vals) == 0:
-        return np.nan
-
-    if direction == "up":
-        consistent_vals = vals[vals > 1]
-    elif direction == "down":
-        consistent_vals = vals[vals < 1]
-    elif direction == "no":
-        consistent_vals = vals[np.isclose(vals, 1.0, atol=tolerance)]
-    else:
-        return np.nan
-
-    if len(consistent_vals) == 0:
-        return np.nan
-    return np.exp(np.mean(np.log(consistent_vals)))
-
-for df, label in [(df_up, "up"), (df_down, "down"), (df_no, "no")]:
-    df["flux_fold"] = df[cols_wo_id].apply(lambda r: geometric_mean_consistent(r, label), axis=1)
-    df["Valid_Count"] = df[cols_wo_id].apply(lambda r: np.sum(~np.isnan(r.replace([np.inf, -np.inf], np.nan))), axis=1)
-
-final_excel = os.path.join(output_dir, "fluxfold_final.xlsx" if use_stable_mode else "fluxfold_final_sensitive_mode.xlsx")
-
-with pd.ExcelWriter(final_excel, engine="openpyxl") as writer:
-    df_up[["ID", "flux_fold", "Valid_Count"]].to_excel(writer, sheet_name="up", index=False)
-    df_down[["ID", "flux_fold", "Valid_Count"]].to_excel(writer, sheet_name="down", index=False)
-    df_no[["ID", "flux_fold", "Valid_Count"]].to_excel(writer, sheet_name="no", index=False)
+names_path = "/mnt/NFS/fengch/TPM/heat/reference_heat.xlsx"
+var_path = "/mnt/NFS/fengch/TPM/heat/heat4_flux/sol.xlsx"   # or the REMI .mat result itself
+output_dir = "/mnt/NFS/fengch/TPM/heat/heat4_flux"
 
+threshold_ratio = 0.8
+tolerance = 1e-6
+use_stable_mode = True
+excel_report = False   # also keep fluxfold_raw as .xlsx
+
+
+def read_solutions(path):
+    """REMI solutions from a REMI .mat result or an exported VAR_NAMES table."""
+    if path.lower().endswith(".mat"):
+        return load_remi_solutions(path)
+    var_df = read_table(path)
+    data_cols = [col for col in var_df.columns if col != 'VAR_NAMES']
+    # rows without a name can never match
+    var_names = var_df['VAR_NAMES'].where(var_df['VAR_NAMES'].notna(), '')
+    return RemiSolutions(var_names, var_df[data_cols].to_numpy(dtype=float), data_cols)
+
+
+def fold_table(names, solutions):
+    """Per-solution PERTURB_NF_/NF_ ratio for every name with both variables."""
+    ids = [str(name).strip() for name in names]
+    nf_rows = solutions.rows([f'NF_{name}' for name in ids])
+    perturb_rows = solutions.rows([f'PERTURB_NF_{name}' for name in ids])
+    found = (nf_rows >= 0) & (perturb_rows >= 0)
+
+    nf_val = solutions.values[nf_rows[found]]
+    pert_val = solutions.values[perturb_rows[found]]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fold = pert_val / nf_val
+    fold[(nf_val > 0) & (pert_val == 0)] = 0.0
+    fold[(nf_val == 0) & (pert_val > 0)] = np.inf
+    fold[(nf_val == 0) & (pert_val == 0)] = np.nan
+
+    result_df = pd.DataFrame(fold, columns=[f'{col}_fold' for col in solutions.columns])
+    result_df.insert(0, 'ID', [name for name, ok in zip(ids, found) if ok])
+    return result_df
+
+
+def classify_directions(fold, stable_mode=use_stable_mode, ratio=threshold_ratio, tol=tolerance):
+    """"up"/"down"/"no"/None per row of a (reactions x solutions) fold array."""
+    vals = np.where(np.isinf(fold), np.nan, fold)
+    valid = vals > 0
+    n_valid = valid.sum(axis=1)
+    total = np.full(len(vals), vals.shape[1]) if stable_mode else n_valid
+
+    ups = (valid & (vals > 1 + tol)).sum(axis=1)
+    downs = (valid & (vals < 1 - tol)).sum(axis=1)
+    equals = (valid & np.isclose(vals, 1.0, atol=tol)).sum(axis=1)
+
+    direction = np.full(len(vals), None, dtype=object)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for label, count in (("no", equals), ("down", downs), ("up", ups)):
+            direction[count / total >= ratio] = label
+    direction[(total == 0) | (n_valid == 0)] = None
+    return direction
+
+
+def geometric_mean_consistent(fold, direction, tol=tolerance):
+    """Geometric mean of the positive folds that agree with each row's direction."""
+    vals = np.where(np.isinf(fold), np.nan, fold)
+    positive = vals > 0
+    consistent = np.zeros_like(positive)
+    consistent[direction == "up"] = (vals > 1)[direction == "up"]
+    consistent[direction == "down"] = (vals < 1)[direction == "down"]
+    consistent[direction == "no"] = np.isclose(vals, 1.0, atol=tol)[direction == "no"]
+    consistent &= positive
+
+    # move each row's consistent values to the front (order kept) and take
+    # the mean over rows with the same count, so the sums run exactly as
+    # np.mean over the selected values would
+    order = np.argsort(~consistent, axis=1, kind='stable')
+    packed = np.take_along_axis(vals, order, axis=1)
+    n = consistent.sum(axis=1)
+    result = np.full(len(vals), np.nan)
+    for k in np.unique(n[n > 0]):
+        rows = n == k
+        result[rows] = np.exp(np.mean(np.log(packed[rows, :k]), axis=1))
+    return result
+
+
+def main():
+    os.makedirs(output_dir, exist_ok=True)
+
+    names_df = read_table(names_path)
+    solutions = read_solutions(var_path)
+
+    names_col = [c for c in names_df.columns if 'name' in c.lower() or 'id' in c.lower()][0]
+    result_df = fold_table(names_df[names_col], solutions)
+
+    fold_file = os.path.join(output_dir, "fluxfold_raw.parquet")
+    write_table(result_df, fold_file, excel=excel_report)
+
+    cols_wo_id = result_df.columns.difference(['ID'])
+    fold = result_df[cols_wo_id].to_numpy(dtype=float)
+
+    result_df["Direction"] = classify_directions(fold)
+    result_df["flux_fold"] = geometric_mean_consistent(fold, result_df["Direction"].to_numpy())
+    result_df["Valid_Count"] = (~np.isnan(np.where(np.isinf(fold), np.nan, fold))).sum(axis=1)
+
+    df_up = result_df[result_df["Direction"] == "up"].copy()
+    df_down = result_df[result_df["Direction"] == "down"].copy()
+    df_no = result_df[result_df["Direction"] == "no"].copy()
+
+    final_excel = os.path.join(output_dir, "fluxfold_final.xlsx" if use_stable_mode else "fluxfold_final_sensitive_mode.xlsx")
+
+    with pd.ExcelWriter(final_excel, engine="openpyxl") as writer:
+        df_up[["ID", "flux_fold", "Valid_Count"]].to_excel(writer, sheet_name="up", index=False)
+        df_down[["ID", "flux_fold", "Valid_Count"]].to_excel(writer, sheet_name="down", index=False)
+        df_no[["ID", "flux_fold", "Valid_Count"]].to_excel(writer, sheet_name="no", index=False)
+
+
+if __name__ == "__main__":
+    main()
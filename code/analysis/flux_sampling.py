@@ -0,0 +1,153 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+N_SAMPLES = 5000
+THINNING = 100
+PROCESSES = 8
+BATCH_SIZE = 1000
+SUMMARY_BLOCK = 256
+QUANTILES = (0.05, 0.5, 0.95)
+TOL_ZERO = 1e-9
+
+_SAMPLES = "samples.npy"
+_META = "meta.json"
+
+
+def _write_meta(path, meta):
+    tmp = os.path.join(path, f"{_META}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(meta, fh)
+    os.replace(tmp, os.path.join(path, _META))
+
+
+def sample_to_disk(model, path, n=N_SAMPLES, thinning=THINNING, processes=PROCESSES,
+                   batch_size=BATCH_SIZE, method="optgp", seed=None):
+    """Draw ``n`` flux samples of ``model`` into ``path``/samples.npy, one batch at a time.
+
+    ``optgp`` runs ``processes`` chains in parallel processes, ``achr`` a
+    single chain. Each batch goes straight into a memory-mapped
+    (samples x reactions) array; meta.json records the reaction ids and
+    how many rows are filled, so an interrupted run leaves a usable
+    prefix. Returns ``path``.
+    """
+    from cobra.sampling import ACHRSampler, OptGPSampler
+
+    if method == "optgp":
+        sampler = OptGPSampler(model, thinning=thinning, processes=processes, seed=seed)
+    elif method == "achr":
+        sampler = ACHRSampler(model, thinning=thinning, seed=seed)
+    else:
+        raise ValueError(f"unknown sampling method {method!r}")
+
+    reactions = [r.id for r in model.reactions]
+    os.makedirs(path, exist_ok=True)
+    out = np.lib.format.open_memmap(os.path.join(path, _SAMPLES), mode="w+",
+                                    dtype=np.float64, shape=(n, len(reactions)))
+    meta = {"model": model.id, "reactions": reactions, "method": method, "thinning": thinning,
+            "seed": seed, "n_samples": 0}
+    _write_meta(path, meta)
+
+    done = 0
+    while done < n:
+        # OptGP rounds a batch up to a multiple of its chains
+        batch = sampler.sample(min(batch_size, n - done)).to_numpy()[:n - done]
+        out[done:done + len(batch)] = batch
+        out.flush()
+        done += len(batch)
+        meta["n_samples"] = done
+        _write_meta(path, meta)
+        print(f"{path}: {done}/{n} samples")
+    del out
+    return path
+
+
+def load_samples(path, mmap=True):
+    """``(reaction ids, samples)`` of a sample directory; only the filled rows are returned."""
+    with open(os.path.join(path, _META), encoding="utf-8") as fh:
+        meta = json.load(fh)
+    samples = np.load(os.path.join(path, _SAMPLES), mmap_mode="r" if mmap else None)
+    return meta["reactions"], samples[:meta["n_samples"]]
+
+
+def _blocks(n_columns, block):
+    for start in range(0, n_columns, block):
+        yield slice(start, min(start + block, n_columns))
+
+
+def sample_summary(samples, reactions, quantiles=QUANTILES, block=SUMMARY_BLOCK, tol=TOL_ZERO):
+    """Per-reaction mean, std, quantiles and sign frequencies of a (samples x reactions) array.
+
+    Reactions are read ``block`` columns at a time, so memory-mapped
+    sample sets are never loaded whole.
+    """
+    n_rxn = samples.shape[1]
+    stats = {name: np.empty(n_rxn) for name in ("mean", "std", "p_positive", "p_negative")}
+    q = np.empty((len(quantiles), n_rxn))
+    for cols in _blocks(n_rxn, block):
+        x = np.asarray(samples[:, cols], dtype=float)
+        stats["mean"][cols] = x.mean(axis=0)
+        stats["std"][cols] = x.std(axis=0, ddof=1) if len(x) > 1 else np.nan
+        stats["p_positive"][cols] = (x > tol).mean(axis=0)
+        stats["p_negative"][cols] = (x < -tol).mean(axis=0)
+        q[:, cols] = np.quantile(x, quantiles, axis=0)
+    df = pd.DataFrame({"mean": stats["mean"], "std": stats["std"]}, index=pd.Index(reactions, name="reaction"))
+    for k, level in enumerate(quantiles):
+        df[f"q{level * 100:g}"] = q[k]
+    df["p_positive"] = stats["p_positive"]
+    df["p_negative"] = stats["p_negative"]
+    return df
+
+
+def differential_flux(samples_a, samples_b, reactions, block=SUMMARY_BLOCK, tol=TOL_ZERO):
+    """Compare two sample sets over the same reactions, ``b`` against ``a``.
+
+    ``p_greater`` is the probability that a flux drawn from ``b`` exceeds
+    one drawn from ``a`` (ties count half); ``z`` is the mean difference
+    over the pooled standard deviation and ``log2_fold`` compares the
+    median absolute fluxes. Reactions with both medians under ``tol`` get
+    no fold.
+    """
+    n_rxn = samples_a.shape[1]
+    if samples_b.shape[1] != n_rxn:
+        raise ValueError(f"{n_rxn} reactions against {samples_b.shape[1]}")
+    out = {name: np.empty(n_rxn) for name in ("mean_a", "mean_b", "z", "log2_fold", "p_greater")}
+    for cols in _blocks(n_rxn, block):
+        a = np.sort(np.asarray(samples_a[:, cols], dtype=float), axis=0)
+        b = np.asarray(samples_b[:, cols], dtype=float)
+        mean_a, mean_b = a.mean(axis=0), b.mean(axis=0)
+        sd = np.sqrt((a.var(axis=0, ddof=1) + b.var(axis=0, ddof=1)) / 2.0)
+        med_a, med_b = np.abs(np.median(a, axis=0)), np.abs(np.median(b, axis=0))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out["z"][cols] = np.where(sd > tol, (mean_b - mean_a) / sd, 0.0)
+            fold = np.log2(np.maximum(med_b, tol) / np.maximum(med_a, tol))
+        out["log2_fold"][cols] = np.where((med_a < tol) & (med_b < tol), np.nan, fold)
+        out["mean_a"][cols], out["mean_b"][cols] = mean_a, mean_b
+        p = np.empty(a.shape[1])
+        for j in range(a.shape[1]):
+            below = np.searchsorted(a[:, j], b[:, j], side="left")
+            upto = np.searchsorted(a[:, j], b[:, j], side="right")
+            p[j] = (below + upto).sum() / (2.0 * len(a) * len(b))
+        out["p_greater"][cols] = p
+    df = pd.DataFrame(out, index=pd.Index(reactions, name="reaction"))
+    df.insert(2, "diff", df["mean_b"] - df["mean_a"])
+    return df
+
+
+def main():
+    # python flux_sampling.py <model> <out_dir> [n_samples]
+    from model_cache import load_model
+    from table_io import write_table
+
+    src, dst = sys.argv[1:3]
+    n = int(sys.argv[3]) if len(sys.argv) > 3 else N_SAMPLES
+    sample_to_disk(load_model(src), dst, n=n)
+    reactions, samples = load_samples(dst)
+    write_table(sample_summary(samples, reactions).reset_index(), os.path.join(dst, "summary.parquet"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import hashlib
+import os
+
+import pandas as pd
+from cobra.flux_analysis import flux_variability_analysis
+
+from model_cache import load_model, model_digest, path_digest
+
+FVA_CACHE_DIR = os.environ.get(
+    "ICNG99_FVA_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "iCNG99", "fva"),
+)
+FVA_PROCESSES = 8
+
+
+def _fva_key(model, fraction_of_optimum, loopless):
+    key = repr((model_digest(model), float(fraction_of_optimum), bool(loopless)))
+    return hashlib.sha256(key.encode()).hexdigest()[:24]
+
+
+def _normalize_fva_cols(df):
+    return df.rename(columns=lambda c: "minimum" if c.lower().startswith("min") else
+                     ("maximum" if c.lower().startswith("max") else c))
+
+
+def _cache_path(model, fraction_of_optimum, loopless, cache_dir):
+    return os.path.join(cache_dir, _fva_key(model, fraction_of_optimum, loopless) + ".pkl")
+
+
+def cached_reactions(model, fraction_of_optimum=1.0, loopless=False, cache_dir=FVA_CACHE_DIR):
+    """Ids of the reactions whose FVA range is already cached for this model."""
+    path = _cache_path(model, fraction_of_optimum, loopless, cache_dir)
+    return set(pd.read_pickle(path).index) if os.path.exists(path) else set()
+
+
+def cached_fva(model, reaction_list=None, fraction_of_optimum=1.0, processes=FVA_PROCESSES,
+               loopless=False, cache_dir=FVA_CACHE_DIR):
+    """FVA ranges for ``reaction_list``, computing only reactions not cached yet.
+
+    Results are stored per model content (stoichiometry, bounds, objective)
+    and ``fraction_of_optimum``, so later calls on the same network only
+    pay for reactions they have not asked for before.
+    """
+    if reaction_list is None:
+        wanted = [r.id for r in model.reactions]
+    else:
+        wanted = list(dict.fromkeys(getattr(r, "id", r) for r in reaction_list))
+
+    path = _cache_path(model, fraction_of_optimum, loopless, cache_dir)
+    cached = pd.DataFrame(columns=["minimum", "maximum"], dtype=float)
+    if os.path.exists(path):
+        cached = pd.read_pickle(path)
+
+    missing = [r for r in wanted if r not in cached.index]
+    if missing:
+        print(f"FVA: {len(wanted) - len(missing)} cached, {len(missing)} to compute")
+        res = flux_variability_analysis(
+            model,
+            reaction_list=missing,
+            fraction_of_optimum=fraction_of_optimum,
+            loopless=loopless,
+            processes=processes
+        )
+        res = _normalize_fva_cols(res)[["minimum", "maximum"]]
+        cached = res if cached.empty else pd.concat([cached, res])
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        cached.to_pickle(tmp)
+        os.replace(tmp, path)
+
+    return cached.loc[wanted].copy()
+
+
+def fva_many(models, reaction_list=None, fraction_of_optimum=1.0, processes=FVA_PROCESSES,
+             loopless=False, cache_dir=FVA_CACHE_DIR):
+    """FVA for several models or model paths, each distinct network solved once.
+
+    ``models`` maps a name to a cobra model or a model file. Returns one
+    frame with ``(name, minimum/maximum)`` columns.
+    """
+    results, loaded, computed = {}, {}, {}
+    for name, model in models.items():
+        if isinstance(model, str):
+            digest = path_digest(model)
+            if digest not in loaded:
+                loaded[digest] = load_model(model)
+            model = loaded[digest]
+        digest = model_digest(model)
+        if digest not in computed:
+            computed[digest] = cached_fva(model, reaction_list, fraction_of_optimum,
+                                          processes, loopless, cache_dir)
+        results[name] = computed[digest]
+    return pd.concat(results, axis=1)
@@ -0,0 +1,151 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+Q_DMID = 0.7
+Q_DWIDTH = 0.7
+OVERLAP_MAX = 0.6
+TOL_ZERO = 1e-6
+TOL_NONZERO = 1e-6
+
+
+class FVAIntervals:
+    """FVA ranges of several conditions over one reaction list.
+
+    ``bounds[k, j]`` is ``(minimum, maximum)`` of reaction ``reactions[j]``
+    in condition ``conditions[k]``; reactions without a range in a
+    condition are NaN there.
+    """
+
+    def __init__(self, conditions, reactions, bounds):
+        self.conditions = list(conditions)
+        self.reactions = list(reactions)
+        self.bounds = np.asarray(bounds, dtype=float)
+        if self.bounds.shape != (len(self.conditions), len(self.reactions), 2):
+            raise ValueError(f"bounds of shape {self.bounds.shape} for {len(self.conditions)} conditions "
+                             f"and {len(self.reactions)} reactions")
+
+    @classmethod
+    def from_frame(cls, fva):
+        """From the ``(condition, minimum/maximum)`` frame returned by fva_cache.fva_many."""
+        conditions = list(dict.fromkeys(fva.columns.get_level_values(0)))
+        bounds = np.stack([fva[name][["minimum", "maximum"]].to_numpy(dtype=float) for name in conditions])
+        return cls(conditions, fva.index, bounds)
+
+    @property
+    def lo(self):
+        return self.bounds[..., 0]
+
+    @property
+    def hi(self):
+        return self.bounds[..., 1]
+
+    def condition_index(self, name):
+        return self.conditions.index(name)
+
+    def inactive(self, tol=TOL_ZERO):
+        """(conditions x reactions) mask of ranges pinned at zero."""
+        return (np.abs(self.lo) < tol) & (np.abs(self.hi) < tol)
+
+
+def all_pairs(conditions):
+    return list(itertools.combinations(conditions, 2))
+
+
+def interval_stats(intervals, pairs=None, tol_zero=TOL_ZERO, tol_nonzero=TOL_NONZERO):
+    """Interval statistics for every pair of conditions, as (pairs x reactions) arrays.
+
+    ``dmid`` and ``dwidth`` are the absolute differences of the range
+    midpoints and widths, ``overlap`` the overlap of the two ranges over
+    their union, ``nonzero`` whether either range reaches ``tol_nonzero``
+    and ``inactive`` whether both are pinned at zero. ``common`` marks the
+    reactions with a range in both conditions.
+    """
+    pairs = all_pairs(intervals.conditions) if pairs is None else list(pairs)
+    ia = np.array([intervals.condition_index(a) for a, _ in pairs], dtype=np.intp)
+    ib = np.array([intervals.condition_index(b) for _, b in pairs], dtype=np.intp)
+
+    lo, hi = intervals.lo, intervals.hi
+    mid = (lo + hi) / 2.0
+    width = np.abs(hi - lo)
+    # fmin/fmax skip a NaN bound like the row-wise pandas min/max did
+    far = np.fmax(np.abs(lo), np.abs(hi))
+    inactive = intervals.inactive(tol_zero)
+    present = ~np.all(np.isnan(intervals.bounds), axis=2)
+
+    overlap = np.clip(np.fmin(hi[ia], hi[ib]) - np.fmax(lo[ia], lo[ib]), 0, None)
+    union = np.clip(np.fmax(hi[ia], hi[ib]) - np.fmin(lo[ia], lo[ib]), 1e-12, None)
+    return {
+        "pairs": pairs,
+        "dmid": np.abs(mid[ia] - mid[ib]),
+        "dwidth": np.abs(width[ia] - width[ib]),
+        "overlap": overlap / union,
+        "nonzero": (far[ia] >= tol_nonzero) | (far[ib] >= tol_nonzero),
+        "inactive": inactive[ia] & inactive[ib],
+        "common": present[ia] & present[ib],
+    }
+
+
+def changed_mask(stats, q_dmid=Q_DMID, q_dwidth=Q_DWIDTH, overlap_max=OVERLAP_MAX):
+    """(pairs x reactions) mask of reactions whose ranges moved between the two conditions.
+
+    A reaction is kept when its midpoint or width shift reaches the
+    ``q_dmid``/``q_dwidth`` quantile of its pair (over the common
+    reactions), its ranges overlap by less than ``overlap_max`` and it
+    carries flux in either condition. Returns the mask and the two
+    per-pair cutoffs.
+    """
+    common = stats["common"]
+    with np.errstate(invalid="ignore"):
+        dmid = np.where(common, stats["dmid"], np.nan)
+        dwidth = np.where(common, stats["dwidth"], np.nan)
+        cut_dmid = _nanquantile_rows(dmid, q_dmid)
+        cut_dwidth = _nanquantile_rows(dwidth, q_dwidth)
+        primary = (dmid >= cut_dmid[:, None]) | (dwidth >= cut_dwidth[:, None])
+        keep = primary & (stats["overlap"] < overlap_max) & stats["nonzero"] & common
+    return keep, cut_dmid, cut_dwidth
+
+
+def _nanquantile_rows(values, q):
+    # rows with nothing to rank get no cutoff instead of a warning
+    cut = np.full(len(values), np.nan)
+    has = ~np.all(np.isnan(values), axis=1)
+    if has.any():
+        cut[has] = np.nanquantile(values[has], q, axis=1)
+    return cut
+
+
+def compare(intervals, pairs=None, q_dmid=Q_DMID, q_dwidth=Q_DWIDTH, overlap_max=OVERLAP_MAX,
+            tol_zero=TOL_ZERO, tol_nonzero=TOL_NONZERO):
+    """Per pair ``(a, b)``: ``(inactive_both, changed)`` reaction id sets."""
+    stats = interval_stats(intervals, pairs, tol_zero, tol_nonzero)
+    keep, _, _ = changed_mask(stats, q_dmid, q_dwidth, overlap_max)
+    reactions = np.asarray(intervals.reactions, dtype=object)
+    return {pair: (set(reactions[stats["inactive"][p]]), set(reactions[keep[p]]))
+            for p, pair in enumerate(stats["pairs"])}
+
+
+def export_index_value(df, rxn_to_index, index_path, value_path):
+    """Write the 1-based model index and the value of each reaction in ``df``, as REMI reads them."""
+    df = df.copy()
+    df["index"] = df["reaction"].map(rxn_to_index)
+    df = df.dropna(subset=["index"])
+    df["index"] = df["index"].astype(int) + 1
+    df[["index"]].to_excel(index_path, index=False, header=False)
+    df[["value"]].to_excel(value_path, index=False, header=False)
+    return len(df)
+
+
+def comparison_table(intervals, pairs=None, **kwargs):
+    """Long table of the pairwise statistics, one row per (pair, reaction)."""
+    stats = interval_stats(intervals, pairs)
+    keep, _, _ = changed_mask(stats, **kwargs)
+    rows = []
+    for p, (a, b) in enumerate(stats["pairs"]):
+        rows.append(pd.DataFrame({
+            "condition_a": a, "condition_b": b, "reaction": intervals.reactions,
+            "dmid": stats["dmid"][p], "dwidth": stats["dwidth"][p], "overlap": stats["overlap"][p],
+            "inactive_both": stats["inactive"][p], "changed": keep[p],
+        }))
+    return pd.concat(rows, ignore_index=True)
@@ -0,0 +1,184 @@
+import os
+import sys
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+from cobra.util.solver import fix_objective_as_constraint
+from optlang.symbolics import Zero
+
+from gpr import CompiledGPR, gpr_genes, split_gpr
+from model_cache import load_model
+
+OBJ_FRAC = 0.9              # required fraction of the maximal objective
+THRESHOLD_QUANTILE = 0.25   # per-condition expression cutoff when none is given
+PROCESSES = 8
+TOL_ZERO = 1e-8
+
+# activity codes, as in the COBRA Toolbox GIMME
+REMOVED, EXPRESSED, REQUIRED, NO_DATA = 0, 1, 2, -1
+
+_worker = {}
+
+
+def reaction_expression(model, genes):
+    """(reactions x conditions) expression from a gene table.
+
+    ``genes`` has the gene ids in its first column and one column per
+    condition. Rules are evaluated as in average_reaction.py (min over an
+    AND group, mean over the OR groups); reactions without a rule or
+    without any measured gene get NaN.
+    """
+    gene_ids = genes.iloc[:, 0].astype(str)
+    measured = set(gene_ids)
+    rules = [r.gene_reaction_rule for r in model.reactions]
+    gpr = CompiledGPR([split_gpr(rule) if rule else None for rule in rules], gene_ids)
+    values = gpr.evaluate(genes.iloc[:, 1:].to_numpy(dtype=float))
+    has_data = np.array([bool(rule) and bool(gpr_genes(split_gpr(rule)) & measured) for rule in rules])
+    values[~has_data] = np.nan
+    return pd.DataFrame(values, index=[r.id for r in model.reactions], columns=genes.columns[1:])
+
+
+def read_expression(path, model):
+    """Reaction expression from a table: a ``reaction`` column is taken as is,
+    anything else is read as a gene table (see reaction_expression)."""
+    from table_io import read_table
+
+    df = read_table(path)
+    if "reaction" in df.columns:
+        return df.set_index("reaction").reindex([r.id for r in model.reactions]).astype(float)
+    return reaction_expression(model, df)
+
+
+def condition_thresholds(expression, threshold=None, quantile=THRESHOLD_QUANTILE):
+    """One cutoff per condition: ``threshold`` (a number or a per-condition
+    mapping), or else the ``quantile`` of that condition's reaction expression."""
+    if threshold is None:
+        return expression.quantile(quantile)
+    if np.isscalar(threshold):
+        return pd.Series(float(threshold), index=expression.columns)
+    return pd.Series(threshold, dtype=float).reindex(expression.columns)
+
+
+def gimme_penalties(values, threshold):
+    """``threshold - expression`` for reactions below the cutoff, 0 otherwise or without data."""
+    values = np.asarray(values, dtype=float)
+    return np.where(np.isnan(values), 0.0, np.clip(threshold - values, 0, None))
+
+
+class GimmeLP:
+    """One GIMME problem per model, solved for many penalty vectors.
+
+    The objective is fixed above ``obj_frac`` of its optimum once; each
+    :meth:`solve` only rewrites the linear coefficients of the
+    forward/reverse flux variables and minimizes ``sum(c_j |v_j|)``.
+    """
+
+    def __init__(self, model, obj_frac=OBJ_FRAC):
+        self.model = model
+        self.reactions = list(model.reactions)
+        fix_objective_as_constraint(model, fraction=obj_frac)
+        model.objective = model.problem.Objective(Zero, direction="min", sloppy=True)
+        self._penalized = {}
+
+    def solve(self, penalties):
+        """Fluxes and inconsistency score for ``penalties`` (model reaction order); None if not optimal."""
+        coefficients = {v: 0 for v in self._penalized}
+        self._penalized = {}
+        for rxn, c in zip(self.reactions, penalties):
+            if c > 0:
+                for v in (rxn.forward_variable, rxn.reverse_variable):
+                    coefficients[v] = self._penalized[v] = float(c)
+        self.model.solver.objective.set_linear_coefficients(coefficients)
+        score = self.model.slim_optimize()
+        if self.model.solver.status != "optimal":
+            return None, np.nan
+        primal = self.model.solver.primal_values
+        return np.array([primal[r.id] - primal[r.reverse_id] for r in self.reactions]), score
+
+
+def reaction_activity(values, threshold, fluxes, tol=TOL_ZERO):
+    """GIMME activity codes: expressed above the cutoff, required by the
+    flux solution, without data (kept), or removed."""
+    values = np.asarray(values, dtype=float)
+    activity = np.full(len(values), REMOVED)
+    if fluxes is not None:
+        activity[np.abs(fluxes) > tol] = REQUIRED
+    activity[values > threshold] = EXPRESSED
+    activity[np.isnan(values)] = NO_DATA
+    return activity
+
+
+def _init_worker(model_path, obj_frac):
+    _worker["lp"] = GimmeLP(load_model(model_path), obj_frac)
+
+
+def _solve(args):
+    name, penalties = args
+    fluxes, score = _worker["lp"].solve(penalties)
+    return name, fluxes, score
+
+
+def gimme_many(model_path, expression, threshold=None, quantile=THRESHOLD_QUANTILE,
+               obj_frac=OBJ_FRAC, processes=PROCESSES, tol=TOL_ZERO):
+    """Run GIMME for every column of ``expression`` (reactions x conditions).
+
+    Each worker loads ``model_path`` once, fixes the objective and then
+    only swaps penalty coefficients per condition. Returns the
+    (reactions x conditions) activity codes and a per-condition frame
+    with the cutoff and the inconsistency score.
+    """
+    model = load_model(model_path)
+    ids = [r.id for r in model.reactions]
+    expression = expression.reindex(ids)
+    cutoffs = condition_thresholds(expression, threshold, quantile)
+    tasks = [(name, gimme_penalties(expression[name], cutoffs[name])) for name in expression.columns]
+
+    if processes is None or processes <= 1 or len(tasks) <= 1:
+        _init_worker(model_path, obj_frac)
+        results = list(map(_solve, tasks))
+    else:
+        with Pool(min(processes, len(tasks)), initializer=_init_worker,
+                  initargs=(model_path, obj_frac)) as pool:
+            results = pool.map(_solve, tasks)
+
+    activity, scores = {}, {}
+    for name, fluxes, score in results:
+        if fluxes is None:
+            print(f"GIMME {name}: no optimal solution, keeping expressed reactions only")
+        activity[name] = reaction_activity(expression[name], cutoffs[name], fluxes, tol)
+        scores[name] = score
+    summary = pd.DataFrame({"threshold": cutoffs, "inconsistency": pd.Series(scores)})
+    summary["reactions_kept"] = [int((activity[name] != REMOVED).sum()) for name in summary.index]
+    return pd.DataFrame(activity, index=ids), summary
+
+
+def context_model(model, activity):
+    """Copy of ``model`` without the reactions whose activity is REMOVED."""
+    context = model.copy()
+    removed = [context.reactions.get_by_id(rid) for rid, a in activity.items() if a == REMOVED]
+    context.remove_reactions(removed, remove_orphans=True)
+    return context
+
+
+def main():
+    # python gimme.py <model> <expression table> <out_dir> [threshold]
+    from cobra.io import write_sbml_model
+    from table_io import write_table
+
+    model_path, expression_path, out_dir = sys.argv[1:4]
+    threshold = float(sys.argv[4]) if len(sys.argv) > 4 else None
+    model = load_model(model_path)
+    activity, summary = gimme_many(model_path, read_expression(expression_path, model), threshold=threshold)
+
+    os.makedirs(out_dir, exist_ok=True)
+    write_table(activity.rename_axis("reaction").reset_index(), os.path.join(out_dir, "gimme_activity.parquet"))
+    for name in activity.columns:
+        context = context_model(model, activity[name])
+        context.id = f"GIMME_{name}"
+        write_sbml_model(context, os.path.join(out_dir, f"GIMME_{name}.xml"))
+    print(summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import re
+from collections import defaultdict
+from itertools import product
+
+import numpy as np
+
+_TOKEN = re.compile(r"\(|\)|[^\s()]+")
+_OPERATORS = {"and": "and", "&": "and", "&&": "and", "or": "or", "|": "or", "||": "or"}
+
+
+def parse_gpr(rule):
+    """Parse a gene-reaction rule into a nested ``(op, children)`` tree.
+
+    Leaves are gene ids, ``op`` is ``"and"`` or ``"or"``; an empty rule
+    gives ``None``.
+    """
+    if not isinstance(rule, str):
+        return None
+    tokens = _TOKEN.findall(rule)
+    if not tokens:
+        return None
+    pos = 0
+
+    def expr(op):
+        nonlocal pos
+        children = [term(op)]
+        while pos < len(tokens) and _OPERATORS.get(tokens[pos].lower()) == op:
+            pos += 1
+            children.append(term(op))
+        return children[0] if len(children) == 1 else (op, children)
+
+    def term(op):
+        if op == "or":
+            return expr("and")
+        return atom()
+
+    def atom():
+        nonlocal pos
+        if pos >= len(tokens):
+            raise ValueError(f"unexpected end of GPR: {rule!r}")
+        token = tokens[pos]
+        pos += 1
+        if token == "(":
+            node = expr("or")
+            if pos >= len(tokens) or tokens[pos] != ")":
+                raise ValueError(f"unbalanced parentheses in GPR: {rule!r}")
+            pos += 1
+            return node
+        if token == ")" or token.lower() in _OPERATORS:
+            raise ValueError(f"unexpected {token!r} in GPR: {rule!r}")
+        return token
+
+    tree = expr("or")
+    if pos != len(tokens):
+        raise ValueError(f"unexpected {tokens[pos]!r} in GPR: {rule!r}")
+    return tree
+
+
+def gpr_genes(tree):
+    if tree is None:
+        return set()
+    if isinstance(tree, str):
+        return {tree}
+    return set().union(*(gpr_genes(c) for c in tree[1]))
+
+
+def to_dnf(tree):
+    """Minimal disjunctive normal form as a frozenset of gene-set clauses.
+
+    A reaction is blocked by a set of knocked-out genes exactly when every
+    clause contains at least one of them.
+    """
+    if tree is None:
+        return frozenset()
+    if isinstance(tree, str):
+        return frozenset([frozenset([tree])])
+    op, children = tree
+    parts = [to_dnf(c) for c in children]
+    if op == "or":
+        clauses = set().union(*parts)
+    else:
+        clauses = {frozenset().union(*combo) for combo in product(*parts)}
+    return frozenset(c for c in clauses if not any(o < c for o in clauses))
+
+
+def is_blocked(dnf, knockouts):
+    return bool(dnf) and all(clause & knockouts for clause in dnf)
+
+
+def split_gpr(rule):
+    # the plain " or " / " and " split average_reaction.py has always used;
+    # parentheses are not interpreted
+    if not isinstance(rule, str):
+        return None
+    return ("or", [("and", group.split(" and ")) for group in rule.split(" or ")])
+
+
+class CompiledGPR:
+    """GPR trees compiled against a gene table for array evaluation.
+
+    Each rule becomes index arrays into a node-value matrix, so evaluating
+    all rules for all samples is a handful of NumPy operations per tree
+    level. AND takes the minimum over the genes present in the table
+    (0 if none is), OR the mean over its branches, counting a missing
+    gene as 0.
+    """
+
+    def __init__(self, trees, genes):
+        self.gene_rows = {}
+        for row, gene in enumerate(genes):
+            self.gene_rows.setdefault(gene, row)
+        self._nodes = []       # (kind, payload, height)
+        self._memo = {}
+        self.roots = np.array([self._compile(t, in_and=False) for t in trees], dtype=np.intp)
+        self._plan = self._build_plan()
+
+    def _add(self, key, kind, payload, height):
+        if key not in self._memo:
+            self._memo[key] = len(self._nodes)
+            self._nodes.append((kind, payload, height))
+        return self._memo[key]
+
+    def _compile(self, tree, in_and):
+        if tree is None:
+            return self._add(("zero",), "zero", None, 0)
+        if isinstance(tree, str):
+            if tree in self.gene_rows:
+                return self._add(("gene", tree), "gene", self.gene_rows[tree], 0)
+            return None if in_and else self._add(("zero",), "zero", None, 0)
+        op, children = tree
+        ids = [self._compile(c, in_and=(op == "and")) for c in children]
+        ids = [i for i in ids if i is not None]
+        if not ids:
+            return self._add(("zero",), "zero", None, 0)
+        if len(ids) == 1:
+            return ids[0]
+        height = 1 + max(self._nodes[i][2] for i in ids)
+        return self._add((op, tuple(ids)), op, tuple(ids), height)
+
+    def _build_plan(self):
+        n = len(self._nodes)
+        pad = {"and": n, "or": n + 1}      # +inf and 0 padding rows
+        levels = defaultdict(lambda: defaultdict(list))
+        for node_id, (kind, payload, height) in enumerate(self._nodes):
+            if kind in pad:
+                levels[height][kind].append(node_id)
+
+        plan = []
+        for height in sorted(levels):
+            for kind, node_ids in levels[height].items():
+                width = max(len(self._nodes[i][1]) for i in node_ids)
+                idx = np.full((len(node_ids), width), pad[kind], dtype=np.intp)
+                counts = np.empty(len(node_ids))
+                for k, node_id in enumerate(node_ids):
+                    children = self._nodes[node_id][1]
+                    idx[k, :len(children)] = children
+                    counts[k] = len(children)
+                plan.append((kind, np.array(node_ids, dtype=np.intp), idx, counts))
+        return plan
+
+    def evaluate(self, X):
+        """Reaction values for gene matrix ``X`` (genes x samples)."""
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X[:, None]
+        n = len(self._nodes)
+        values = np.zeros((n + 2, X.shape[1]))
+        values[n] = np.inf
+        leaves = [(i, p) for i, (kind, p, _) in enumerate(self._nodes) if kind == "gene"]
+        if leaves:
+            node_ids, rows = map(list, zip(*leaves))
+            values[node_ids] = X[rows]
+
+        for kind, node_ids, idx, counts in self._plan:
+            # accumulate column by column to keep the summation order of
+            # the old per-rule Python loop
+            acc = values[idx[:, 0]]
+            for j in range(1, idx.shape[1]):
+                if kind == "and":
+                    acc = np.minimum(acc, values[idx[:, j]])
+                else:
+                    acc = acc + values[idx[:, j]]
+            values[node_ids] = acc if kind == "and" else acc / counts[:, None]
+        return values[self.roots]
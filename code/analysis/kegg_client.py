@@ -0,0 +1,279 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+KEGG_BASE_URL = os.environ.get("KEGG_BASE_URL", "https://rest.kegg.jp")
+KEGG_CACHE_DIR = os.environ.get(
+    "ICNG99_KEGG_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "iCNG99", "kegg"),
+)
+RATE = 3.0             # requests per second; KEGG blocks clients that go much faster
+BURST = 3
+MAX_WORKERS = 4
+TIMEOUT = 30
+RETRIES = 2
+BACKOFF = 1.6
+BATCH_SIZE = 10        # KEGG's limit for entries per /get call
+FASTA_OPTIONS = ("aaseq", "ntseq")
+
+_NOT_FOUND = ""        # cached 404; real responses are never empty
+
+
+def _entry_key(entry):
+    # KEGG echoes entries without the database prefix in flat files
+    # (ENTRY CNAG_00001) and with it in FASTA headers (>cng:CNAG_00001)
+    return entry.split(":")[-1].upper()
+
+
+class KeggError(RuntimeError):
+    """A KEGG request that still failed after all retries."""
+
+
+def split_records(text, option=None):
+    """Split a multi-entry /get response into ``{entry_key: record_text}``."""
+    records = {}
+    if option in FASTA_OPTIONS:
+        for block in re.split(r"^(?=>)", text, flags=re.M):
+            if block.startswith(">") and block[1:].split():
+                records.setdefault(_entry_key(block[1:].split()[0]), block)
+        return records
+    lines, key = [], None
+    for line in text.splitlines(keepends=True):
+        lines.append(line)
+        if line.startswith("ENTRY") and key is None and len(line.split()) > 1:
+            key = _entry_key(line.split()[1])
+        if line.strip() == "///":
+            if key is not None:
+                records.setdefault(key, "".join(lines))
+            lines, key = [], None
+    return records
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class KeggClient:
+    """KEGG REST client with a pooled session, rate limit and response cache.
+
+    ``get`` has the semantics of the old per-script ``http_get``: the body
+    on HTTP 200, ``None`` on 404, retries with exponential backoff
+    otherwise and ``KeggError`` once they are used up. Bodies and 404s
+    are kept in memory and, unless ``cache_dir`` is ``None``, on disk, so
+    reruns do not hit KEGG again. ``map`` runs a function over many items
+    in a thread pool; all threads share the same rate limit. ``prefetch``
+    fills the cache for many /get entries with multi-entry requests.
+    """
+
+    def __init__(self, base_url=KEGG_BASE_URL, cache_dir=KEGG_CACHE_DIR, rate=RATE, burst=BURST,
+                 max_workers=MAX_WORKERS, timeout=TIMEOUT, retries=RETRIES, backoff=BACKOFF,
+                 batch_size=BATCH_SIZE):
+        self.base_url = base_url.rstrip("/")
+        self.batch_size = batch_size
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.bucket = TokenBucket(rate, burst)
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_maxsize=max_workers))
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=max_workers))
+        self._memo = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.requests_made = 0
+
+    def _cache_path(self, path):
+        digest = hashlib.sha256(path.encode()).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest + ".txt")
+
+    def _read_cache(self, path):
+        if path in self._memo:
+            return True, self._memo[path]
+        if self.cache_dir:
+            cached = self._cache_path(path)
+            if os.path.exists(cached):
+                with open(cached, encoding="utf-8") as fh:
+                    text = fh.read()
+                self._memo[path] = text
+                return True, text
+        return False, None
+
+    def _write_cache(self, path, text):
+        self._memo[path] = text
+        if not self.cache_dir:
+            return
+        cached = self._cache_path(path)
+        os.makedirs(os.path.dirname(cached), exist_ok=True)
+        tmp = f"{cached}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(text)
+        os.replace(tmp, cached)
+
+    def _fetch(self, url):
+        last_err = None
+        for i in range(self.retries + 1):
+            self.bucket.acquire()
+            with self._lock:
+                self.requests_made += 1
+            try:
+                r = self.session.get(url, timeout=self.timeout)
+                if r.status_code == 200 and r.text.strip():
+                    return r.text
+                if r.status_code == 404:
+                    return None
+                last_err = f"HTTP {r.status_code}"
+            except Exception as e:
+                last_err = str(e)
+            if i < self.retries:
+                time.sleep(self.backoff ** i)
+        raise KeggError(f"failure: {url} | {last_err}")
+
+    def get(self, path):
+        """Response body for ``path`` (e.g. ``"get/path:map00010"``), ``None`` on 404."""
+        path = path.lstrip("/")
+        with self._lock:
+            path_lock = self._inflight.setdefault(path, threading.Lock())
+        # concurrent callers for the same path wait for the first fetch;
+        # the lock is dropped once it is done, later callers hit the memo
+        try:
+            with path_lock:
+                hit, text = self._read_cache(path)
+                if hit:
+                    return text or None
+                text = self._fetch(f"{self.base_url}/{path}")
+                self._write_cache(path, _NOT_FOUND if text is None else text)
+                return text
+        finally:
+            with self._lock:
+                if self._inflight.get(path) is path_lock:
+                    del self._inflight[path]
+
+    def map(self, fn, items):
+        """``fn`` over ``items`` on the client's thread pool, results in input order."""
+        items = list(items)
+        if self.max_workers <= 1:
+            return map(fn, items)
+        pool = ThreadPoolExecutor(self.max_workers)
+        results = pool.map(fn, items)
+        pool.shutdown(wait=False)
+        return results
+
+    def get_many(self, paths):
+        return self.map(self.get, paths)
+
+    def prefetch(self, entries, option=None):
+        """Cache ``get/<entry>[/<option>]`` for ``entries`` using batched /get calls.
+
+        Up to ``batch_size`` entries are joined with '+' per request and the
+        response is split back into per-entry records, so later ``get``,
+        ``get_aaseq`` or ``get_name`` calls are served from the cache.
+        Entries missing from a response, or in a batch that fails, are left
+        uncached and fall back to a single-entry request on access. Returns
+        the number of entries cached.
+        """
+        if option is not None and option not in FASTA_OPTIONS:
+            raise ValueError(f"batched /get supports flat files and {FASTA_OPTIONS}, not {option!r}")
+        suffix = f"/{option}" if option else ""
+        todo = [e for e in dict.fromkeys(entries) if not self._read_cache(f"get/{e}{suffix}")[0]]
+
+        # entries with the same key in one batch could not be told apart
+        batches = []
+        for entry in todo:
+            for batch in batches:
+                if len(batch) < self.batch_size and all(_entry_key(e) != _entry_key(entry) for e in batch):
+                    batch.append(entry)
+                    break
+            else:
+                batches.append([entry])
+
+        def fetch_batch(batch):
+            try:
+                text = self._fetch(f"{self.base_url}/get/{'+'.join(batch)}{suffix}")
+            except KeggError:
+                return 0
+            records = split_records(text or "", option)
+            cached = 0
+            for entry in batch:
+                record = records.get(_entry_key(entry))
+                if record is not None:
+                    self._write_cache(f"get/{entry}{suffix}", record)
+                    cached += 1
+            return cached
+
+        return sum(self.map(fetch_batch, batches))
+
+    def find_genes(self, query):
+        """``(best_entry, [(entry, description), ...])`` for a gene search."""
+        txt = self.get(f"find/genes/{query}")
+        if not txt:
+            return None, []
+        parsed = []
+        for ln in txt.strip().splitlines():
+            if "\t" in ln:
+                left, right = ln.split("\t", 1)
+                parsed.append((left.strip(), right.strip()))
+        if not parsed:
+            return None, []
+        exact = [p for p in parsed if p[0].split(":")[-1].upper() == query.upper()]
+        if exact:
+            return exact[0][0], parsed
+        return parsed[0][0], parsed
+
+    def get_aaseq(self, entry):
+        """``(header, sequence)`` of an entry's first amino-acid FASTA record."""
+        txt = self.get(f"get/{entry}/aaseq")
+        if not txt:
+            return None, None
+        blocks = txt.strip().split("\n>")
+        first = blocks[0] if txt.startswith(">") else ">" + blocks[0]
+        lines = first.strip().splitlines()
+        header = lines[0].lstrip(">").strip()
+        seq = "".join(x.strip() for x in lines[1:])
+        return header, seq
+
+    def get_name(self, entry):
+        """NAME field of a flat-file entry, ``None`` if missing."""
+        txt = self.get(f"get/{entry}")
+        if not txt:
+            return None
+        for line in txt.strip().split("\n"):
+            if line.startswith("NAME"):
+                return line.split(" ", 1)[1].strip()
+        return None
+
+    def link(self, target, entry):
+        """Entries of database ``target`` linked to ``entry``."""
+        txt = self.get(f"link/{target}/{entry}")
+        if not txt:
+            return []
+        links = []
+        for line in txt.strip().split("\n"):
+            fields = line.split("\t")
+            if len(fields) >= 2:
+                links.append(fields[1])
+        return links
@@ -0,0 +1,154 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from kegg_client import KeggClient, KeggError
+
+ROUTES = {
+    "/find/genes/CNAG_00001": (200, "cng:CNAG_00001\thypothetical protein\ncng:CNAG_000011\tother\n"),
+    "/find/genes/CNAG_00002": (200, "cng:CNAG_09999\tclosest hit\n"),
+    "/get/cng:CNAG_00001/aaseq": (200, ">cng:CNAG_00001 hypothetical protein\nMKV\nLLA\n"),
+    "/get/path:map00010": (200, "ENTRY       map00010\nNAME        Glycolysis / Gluconeogenesis\n///\n"),
+    "/link/pathway/R00200": (200, "rn:R00200\tpath:map00010\nrn:R00200\tpath:map00620\n"),
+    "/broken": (500, "error"),
+}
+for i in range(10, 22):
+    ROUTES[f"/get/cng:CNAG_000{i}/aaseq"] = (200, f">cng:CNAG_000{i} protein {i}\nMK{'A' * i}\n")
+ROUTES["/get/path:map00620"] = (200, "ENTRY       map00620                    Pathway\nNAME        Pyruvate metabolism\n///\n")
+
+
+def route(path):
+    parts = path.split("/")
+    if len(parts) < 3 or "+" not in parts[2]:
+        return ROUTES.get(path, (404, ""))
+    # multi-entry /get: records of the entries that exist, in request order
+    found = [ROUTES.get("/".join(parts[:2] + [e] + parts[3:]), (404, "")) for e in parts[2].split("+")]
+    body = "".join(b for status, b in found if status == 200)
+    return (200, body) if body else (404, "")
+
+
+@pytest.fixture
+def server():
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            status, body = route(self.path)
+            data = body.encode()
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}", hits
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def make_client(url, tmp_path, **kwargs):
+    kwargs.setdefault("rate", 1000)
+    kwargs.setdefault("burst", 1000)
+    cache_dir = str(tmp_path) if tmp_path else None
+    return KeggClient(base_url=url, cache_dir=cache_dir, backoff=0.01, **kwargs)
+
+
+def test_parsers(server, tmp_path):
+    url, _ = server
+    client = make_client(url, tmp_path)
+    best, cands = client.find_genes("CNAG_00001")
+    assert best == "cng:CNAG_00001" and len(cands) == 2
+    assert client.find_genes("CNAG_00002")[0] == "cng:CNAG_09999"
+    assert client.find_genes("CNAG_00003") == (None, [])
+    assert client.get_aaseq("cng:CNAG_00001") == ("cng:CNAG_00001 hypothetical protein", "MKVLLA")
+    assert client.get_name("path:map00010") == "Glycolysis / Gluconeogenesis"
+    assert client.link("pathway", "R00200") == ["path:map00010", "path:map00620"]
+
+
+def test_disk_cache_covers_bodies_and_404(server, tmp_path):
+    url, hits = server
+    client = make_client(url, tmp_path)
+    assert client.get("get/path:map00010").startswith("ENTRY")
+    assert client.get("get/missing") is None
+    assert client.get("get/path:map00010").startswith("ENTRY")
+    assert len(hits) == 2
+
+    fresh = make_client(url, tmp_path)
+    assert fresh.get("get/path:map00010").startswith("ENTRY")
+    assert fresh.get("get/missing") is None
+    assert len(hits) == 2 and fresh.requests_made == 0
+
+
+def test_errors_retry_then_raise_and_are_not_cached(server, tmp_path):
+    url, hits = server
+    client = make_client(url, tmp_path, retries=2)
+    with pytest.raises(KeggError):
+        client.get("broken")
+    assert hits == ["/broken"] * 3
+    with pytest.raises(KeggError):
+        client.get("broken")
+    assert len(hits) == 6
+
+
+def test_map_keeps_order_and_fetches_each_path_once(server, tmp_path):
+    url, hits = server
+    client = make_client(url, tmp_path, max_workers=8)
+    paths = ["find/genes/CNAG_00001", "get/path:map00010", "find/genes/CNAG_00002"] * 5
+    results = list(client.get_many(paths))
+    assert results == [ROUTES["/" + p][1] for p in paths]
+    assert sorted(hits) == sorted("/" + p for p in set(paths))
+    assert client._inflight == {}
+
+
+def test_rate_limit(server, tmp_path):
+    url, hits = server
+    client = make_client(url, None, rate=20, burst=1, max_workers=4)
+    start = time.monotonic()
+    list(client.get_many([f"get/missing{i}" for i in range(11)]))
+    assert len(hits) == 11
+    assert time.monotonic() - start >= 0.45
+
+
+def test_prefetch_batches_aaseq(server, tmp_path):
+    url, hits = server
+    client = make_client(url, tmp_path)
+    entries = [f"cng:CNAG_000{i}" for i in range(10, 22)] + ["cng:CNAG_09998"]
+    assert client.prefetch(entries + entries[:3], "aaseq") == 12
+    assert len(hits) == 2 and all("+" in h for h in hits)
+
+    for i, entry in zip(range(10, 22), entries):
+        assert client.get_aaseq(entry) == (f"cng:CNAG_000{i} protein {i}", "MK" + "A" * i)
+    assert len(hits) == 2
+    # missing from its batch: not cached, confirmed by a single request
+    assert client.get_aaseq("cng:CNAG_09998") == (None, None)
+    assert hits[-1] == "/get/cng:CNAG_09998/aaseq"
+
+    fresh = make_client(url, tmp_path)
+    assert fresh.prefetch(entries, "aaseq") == 0 and fresh.requests_made == 0
+
+
+def test_prefetch_flat_files(server, tmp_path):
+    url, hits = server
+    client = make_client(url, tmp_path)
+    assert client.prefetch(["path:map00010", "path:map00620"]) == 2
+    assert hits == ["/get/path:map00010+path:map00620"]
+    assert client.get_name("path:map00010") == "Glycolysis / Gluconeogenesis"
+    assert client.get_name("path:map00620") == "Pyruvate metabolism"
+    assert client.get("get/path:map00010") == ROUTES["/get/path:map00010"][1]
+    assert len(hits) == 1
+
+
+def test_prefetch_missing_batch_falls_back(server, tmp_path):
+    url, hits = server
+    client = make_client(url, tmp_path, retries=0)
+    assert client.prefetch(["broken1", "broken2"]) == 0
+    assert hits == ["/get/broken1+broken2"]
+    assert client.get("get/broken1") is None
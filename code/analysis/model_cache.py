@@ -0,0 +1,86 @@
+import glob
+import hashlib
+import os
+import pickle
+
+from cobra.io import load_json_model, load_matlab_model, read_sbml_model
+
+MODEL_CACHE_DIR = os.environ.get(
+    "ICNG99_MODEL_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "iCNG99", "models"),
+)
+
+
+def file_digest(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def path_digest(path):
+    """file_digest of a model file, or of every file in a model store directory."""
+    if not os.path.isdir(path):
+        return file_digest(path)
+    h = hashlib.sha256()
+    for name in sorted(os.listdir(path)):
+        h.update(f"{name}:{file_digest(os.path.join(path, name))}".encode())
+    return h.hexdigest()
+
+
+def model_digest(model):
+    # content hash of the network: stoichiometry, bounds and objective
+    h = hashlib.sha256()
+    for rxn in model.reactions:
+        coefficients = sorted((m.id, c) for m, c in rxn.metabolites.items())
+        h.update(repr((rxn.id, rxn.lower_bound, rxn.upper_bound, coefficients)).encode())
+    h.update(repr((str(model.objective.expression), model.objective.direction)).encode())
+    return h.hexdigest()
+
+
+def read_model(path):
+    if os.path.isdir(path):
+        from model_store import load_store_model
+        return load_store_model(path)
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".mat":
+        return load_matlab_model(path)
+    if ext == ".json":
+        return load_json_model(path)
+    return read_sbml_model(path)
+
+
+def load_model(path, cache_dir=MODEL_CACHE_DIR):
+    """Load an SBML/.mat/.json model or a model store through a pickle cache.
+
+    The cache entry is keyed on the SHA-256 of the file contents (of all
+    files for a store directory), so an
+    edited model is parsed again and the stale entry is dropped. Every call
+    returns a new model object.
+    """
+    if not cache_dir:
+        return read_model(path)
+
+    # same-named models in different directories get their own entries
+    name = os.path.basename(os.path.normpath(path))
+    where = hashlib.sha256(os.path.abspath(path).encode()).hexdigest()[:8]
+    digest = path_digest(path)
+    cached = os.path.join(cache_dir, f"{name}.{where}.{digest[:16]}.pkl")
+    if os.path.exists(cached):
+        try:
+            with open(cached, "rb") as fh:
+                return pickle.load(fh)
+        except Exception as e:
+            print(f"ignoring unreadable model cache {cached}: {e}")
+
+    model = read_model(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    for stale in glob.glob(os.path.join(glob.escape(cache_dir), glob.escape(f"{name}.{where}") + ".*.pkl")):
+        if stale != cached:
+            os.remove(stale)
+    tmp = f"{cached}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        pickle.dump(model, fh, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, cached)
+    return model
@@ -0,0 +1,186 @@
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+from scipy import sparse
+
+STORE_FORMAT = "iCNG99-model-store"
+STORE_VERSION = 1
+_ARRAYS = ("S_data", "S_indices", "S_indptr", "lb", "ub", "c")
+
+
+class ModelArrays:
+    """Array form of a model.
+
+    ``S`` is the CSR stoichiometric matrix (metabolites x reactions), ``lb``,
+    ``ub`` and ``c`` the bound and objective vectors; ``meta`` holds the
+    id/name tables, GPR rules and everything else needed to rebuild the
+    cobra model.
+    """
+
+    def __init__(self, S, lb, ub, c, meta):
+        self.S = S
+        self.lb = lb
+        self.ub = ub
+        self.c = c
+        self.meta = meta
+        self._reaction_index = None
+
+    @property
+    def reaction_ids(self):
+        return self.meta["reactions"]["id"]
+
+    @property
+    def metabolite_ids(self):
+        return self.meta["metabolites"]["id"]
+
+    @property
+    def gene_ids(self):
+        return self.meta["genes"]["id"]
+
+    @property
+    def gpr_rules(self):
+        return self.meta["reactions"]["gene_reaction_rule"]
+
+    @property
+    def objective_direction(self):
+        return self.meta["objective_direction"]
+
+    @property
+    def reaction_index(self):
+        if self._reaction_index is None:
+            self._reaction_index = {rid: j for j, rid in enumerate(self.reaction_ids)}
+        return self._reaction_index
+
+
+def from_cobra(model):
+    met_index = {met.id: i for i, met in enumerate(model.metabolites)}
+    indptr, indices, data = [0], [], []
+    rows = [[] for _ in model.metabolites]
+    for j, rxn in enumerate(model.reactions):
+        for met, coeff in rxn.metabolites.items():
+            rows[met_index[met.id]].append((j, coeff))
+    for row in rows:
+        row.sort()
+        indices.extend(j for j, _ in row)
+        data.extend(v for _, v in row)
+        indptr.append(len(indices))
+    shape = (len(model.metabolites), len(model.reactions))
+    S = sparse.csr_matrix((np.array(data, dtype=float), np.array(indices, dtype=np.int32),
+                           np.array(indptr, dtype=np.int64)), shape=shape)
+
+    reactions = model.reactions
+    meta = {
+        "format": STORE_FORMAT,
+        "version": STORE_VERSION,
+        "id": model.id,
+        "name": model.name,
+        "compartments": dict(model.compartments),
+        "objective_direction": model.objective.direction,
+        "reactions": {
+            "id": [r.id for r in reactions],
+            "name": [r.name for r in reactions],
+            "subsystem": [r.subsystem for r in reactions],
+            "gene_reaction_rule": [r.gene_reaction_rule for r in reactions],
+        },
+        "metabolites": {
+            "id": [m.id for m in model.metabolites],
+            "name": [m.name for m in model.metabolites],
+            "formula": [m.formula for m in model.metabolites],
+            "charge": [m.charge for m in model.metabolites],
+            "compartment": [m.compartment for m in model.metabolites],
+        },
+        "genes": {
+            "id": [g.id for g in model.genes],
+            "name": [g.name for g in model.genes],
+        },
+    }
+    lb = np.array([r.lower_bound for r in reactions], dtype=float)
+    ub = np.array([r.upper_bound for r in reactions], dtype=float)
+    c = np.array([r.objective_coefficient for r in reactions], dtype=float)
+    return ModelArrays(S, lb, ub, c, meta)
+
+
+def to_cobra(arrays):
+    from cobra import Gene, Metabolite, Model, Reaction
+
+    meta = arrays.meta
+    model = Model(meta["id"], name=meta["name"])
+    m = meta["metabolites"]
+    metabolites = [Metabolite(mid, formula=formula, name=name, charge=charge, compartment=compartment)
+                   for mid, name, formula, charge, compartment
+                   in zip(m["id"], m["name"], m["formula"], m["charge"], m["compartment"])]
+    model.add_metabolites(metabolites)
+    model.compartments = meta["compartments"]
+    # registered up front so the gene order survives the round trip
+    genes = [Gene(gid, name=name) for gid, name in zip(meta["genes"]["id"], meta["genes"]["name"])]
+    for gene in genes:
+        gene._model = model
+    model.genes += genes
+
+    S = sparse.csc_matrix(arrays.S)
+    r = meta["reactions"]
+    reactions = []
+    for j, rid in enumerate(r["id"]):
+        rxn = Reaction(rid, name=r["name"][j], subsystem=r["subsystem"][j],
+                       lower_bound=float(arrays.lb[j]), upper_bound=float(arrays.ub[j]))
+        start, end = S.indptr[j], S.indptr[j + 1]
+        rxn.add_metabolites({metabolites[i]: float(v) for i, v in zip(S.indices[start:end], S.data[start:end])})
+        rxn.gene_reaction_rule = r["gene_reaction_rule"][j]
+        reactions.append(rxn)
+    model.add_reactions(reactions)
+    model.objective = {reactions[j]: float(arrays.c[j]) for j in np.flatnonzero(arrays.c)}
+    model.objective_direction = meta["objective_direction"]
+    return model
+
+
+def save_store(model_or_arrays, path):
+    """Write a model (cobra or ModelArrays) as a directory of .npy arrays plus meta.json."""
+    arrays = model_or_arrays if isinstance(model_or_arrays, ModelArrays) else from_cobra(model_or_arrays)
+    S = sparse.csr_matrix(arrays.S)
+    values = {"S_data": S.data, "S_indices": S.indices, "S_indptr": S.indptr,
+              "lb": arrays.lb, "ub": arrays.ub, "c": arrays.c}
+    meta = dict(arrays.meta, shape=list(S.shape))
+
+    tmp = f"{path.rstrip(os.sep)}.{os.getpid()}.tmp"
+    os.makedirs(tmp)
+    for name in _ARRAYS:
+        np.save(os.path.join(tmp, f"{name}.npy"), np.ascontiguousarray(values[name]))
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as fh:
+        json.dump(meta, fh)
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(tmp, path)
+
+
+def load_store(path, mmap=True):
+    """ModelArrays of a store; with ``mmap`` the arrays are memory-mapped read-only."""
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as fh:
+        meta = json.load(fh)
+    if meta.get("format") != STORE_FORMAT:
+        raise ValueError(f"{path} is not a model store")
+    if meta.get("version", 0) > STORE_VERSION:
+        raise ValueError(f"{path} was written by a newer model store version {meta['version']}")
+    mode = "r" if mmap else None
+    a = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode) for name in _ARRAYS}
+    S = sparse.csr_matrix((a["S_data"], a["S_indices"], a["S_indptr"]), shape=tuple(meta.pop("shape")))
+    return ModelArrays(S, a["lb"], a["ub"], a["c"], meta)
+
+
+def load_store_model(path):
+    return to_cobra(load_store(path, mmap=False))
+
+
+def main():
+    # python model_store.py <model.mat|.xml|.json> <store_dir>
+    from model_cache import load_model
+
+    src, dst = sys.argv[1:3]
+    save_store(load_model(src), dst)
+    print(f"{src} -> {dst}")
+
+
+if __name__ == "__main__":
+    main()
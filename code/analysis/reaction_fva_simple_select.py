@@ -1,14 +1,15 @@
-import os
 import re
 import pandas as pd
-from cobra.io import read_sbml_model
-from cobra.flux_analysis import flux_variability_analysis
+
+from fva_cache import fva_many
+from model_cache import load_model
+from table_io import find_table, read_table
 
 MODEL_CONTROL = "/mnt/NFS/fengch/new/models/paper/merge_after_YPD.xml"
 MODEL_TREATED = "/mnt/NFS/fengch/new/models/paper/merge_after_vivo.xml"
 
-UP_XLSX    = "/mnt/NFS/fengch/TPM/vivo/vivo1_up.xlsx"
-DOWN_XLSX  = "/mnt/NFS/fengch/TPM/vivo/vivo1_down.xlsx"
+UP_TABLE   = "/mnt/NFS/fengch/TPM/vivo/vivo1_up"
+DOWN_TABLE = "/mnt/NFS/fengch/TPM/vivo/vivo1_down"
 
 OUT_UP_IDX   = "/mnt/NFS/fengch/TPM/vivo/test_vivo1_up_index.xlsx"
 OUT_UP_VAL   = "/mnt/NFS/fengch/TPM/vivo/test_vivo1_up_value.xlsx"
@@ -33,11 +34,11 @@ def _normalize_fva_cols(df: pd.DataFrame) -> pd.DataFrame:
         df = df.rename(columns=rename_map)
     return df
 
-def safe_read_excel(path):
-    if path is None or not os.path.exists(path):
+def safe_read_table(path):
+    if path is None or find_table(path) is None:
         print(f"can't find")
         return pd.DataFrame(columns=["reaction", "value"])
-    df = pd.read_excel(path)
+    df = read_table(path)
     if df.empty:
         print(f"empty")
         return pd.DataFrame(columns=["reaction", "value"])
@@ -47,11 +48,11 @@ def safe_read_excel(path):
     return df[["reaction","value"]].copy()
 
 def main():
-    model_control = read_sbml_model(MODEL_CONTROL)
-    model_treated = read_sbml_model(MODEL_TREATED)
+    model_control = load_model(MODEL_CONTROL)
+    model_treated = load_model(MODEL_TREATED)
 
-    up_df   = safe_read_excel(UP_XLSX)
-    down_df = safe_read_excel(DOWN_XLSX)
+    up_df   = safe_read_table(UP_TABLE)
+    down_df = safe_read_table(DOWN_TABLE)
 
     if EXCLUDE_EX_DM_SK:
         pat = re.compile(r"^(EX_|DM_|SK_)")
@@ -65,18 +66,14 @@ def main():
         model_rxn_ids = {r.id for r in model_control.reactions}
         rxn_list = [r for r in set(up_df["reaction"]).union(set(down_df["reaction"])) if r in model_rxn_ids]
 
-    fva_control = flux_variability_analysis(
-        model_control,
-        reaction_list=rxn_list,
-        fraction_of_optimum=FVA_FRACTION,
-        processes=FVA_PROCESSES
-    )
-    fva_treated = flux_variability_analysis(
-        model_treated,
+    fva = fva_many(
+        {"control": model_control, "treated": model_treated},
         reaction_list=rxn_list,
         fraction_of_optimum=FVA_FRACTION,
         processes=FVA_PROCESSES
     )
+    fva_control = fva["control"].dropna(how="all")
+    fva_treated = fva["treated"].dropna(how="all")
 
     fva_control = _normalize_fva_cols(fva_control)
     fva_treated = _normalize_fva_cols(fva_treated)
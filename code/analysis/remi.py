@@ -0,0 +1,203 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from optlang.symbolics import Zero
+
+from remi_loader import RemiSolutions
+
+FRACTION = 0.8          # growth kept in each condition, as in modified_REMI_gene.m
+EPSILON = 1e-3          # flux the higher condition must carry for a regulation to count
+N_ALTERNATIVES = 100
+TIME_LIMIT = None       # seconds per MILP, None for no limit
+TOL_ZERO = 1e-6
+# the direction binaries multiply bounds of 1000; at the default
+# integrality tolerance a "0" binary still lets ~1e-3 flux through
+INTEGRALITY = 1e-9
+PREFIX = "PERTURB_"
+
+
+def regulation_from_tables(up_df, down_df):
+    """``{reaction: log2FC}`` from the up/down tables of filter_active_reactions.py."""
+    frames = [df[["reaction", "value"]] for df in (up_df, down_df) if len(df)]
+    if not frames:
+        return pd.Series(dtype=float)
+    both = pd.concat(frames).dropna().drop_duplicates("reaction", keep="first")
+    return pd.Series(both["value"].to_numpy(dtype=float), index=both["reaction"].astype(str))
+
+
+def _max_abs(rxn):
+    return max(abs(rxn.lower_bound), abs(rxn.upper_bound))
+
+
+class RelExpProblem:
+    """Paired control/treated MILP of REMI's relative expression integration.
+
+    Both networks sit side by side in one solver problem (treated ids get
+    ``PERTURB_``) with their growth held at ``fraction`` of each optimum.
+    Every regulated reaction with treated/control ratio ``r`` gets a
+    binary that may only be 1 if ``|v_treated| >= r |v_control|`` (up) or
+    ``|v_treated| <= r |v_control|`` (down) with the higher side carrying at
+    least ``epsilon``; direction binaries keep the forward and reverse
+    parts of those reactions from both being used. The number of satisfied
+    regulations is maximized.
+    """
+
+    def __init__(self, control, treated, regulation, log2=True, fraction=FRACTION,
+                 epsilon=EPSILON, time_limit=TIME_LIMIT):
+        self.growth = (control.slim_optimize(), treated.slim_optimize())
+        self.model = model = control.copy()
+        self.reaction_ids = [r.id for r in control.reactions]
+        self.treated_ids = [r.id for r in treated.reactions]
+        self._add_treated(treated)
+
+        prob = model.problem
+        required = []
+        for m, grown, prefix, label in ((control, self.growth[0], "", "control"),
+                                        (treated, self.growth[1], PREFIX, "treated")):
+            expr = sum(c * model.reactions.get_by_id(prefix + r.id).flux_expression
+                       for r, c in ((r, r.objective_coefficient) for r in m.reactions) if c)
+            required.append(prob.Constraint(expr, lb=fraction * grown, name=f"remi_growth_{label}"))
+        model.add_cons_vars(required, sloppy=True)
+
+        ratios = regulation.astype(float)
+        if log2:
+            ratios = np.exp2(ratios)
+        treated_set = set(self.treated_ids)
+        control_set = set(self.reaction_ids)
+        ratios = ratios[[rid in control_set and rid in treated_set for rid in ratios.index]]
+        ratios = ratios[ratios.notna() & (ratios > 0) & (ratios != 1)]
+        self.ratios = ratios
+
+        self.z = {}
+        new = []
+        for rid, ratio in ratios.items():
+            r1 = model.reactions.get_by_id(rid)
+            r2 = model.reactions.get_by_id(PREFIX + rid)
+            for rxn in (r1, r2):
+                if rxn.lower_bound < 0 < rxn.upper_bound and f"remi_dir_{rxn.id}" not in model.variables:
+                    y = prob.Variable(f"remi_dir_{rxn.id}", type="binary")
+                    new += [y,
+                            prob.Constraint(rxn.forward_variable - rxn.upper_bound * y, ub=0,
+                                            name=f"remi_fwd_{rxn.id}"),
+                            prob.Constraint(rxn.reverse_variable - rxn.lower_bound * y, ub=-rxn.lower_bound,
+                                            name=f"remi_rev_{rxn.id}")]
+            a1 = r1.forward_variable + r1.reverse_variable
+            a2 = r2.forward_variable + r2.reverse_variable
+            z = prob.Variable(f"remi_z_{rid}", type="binary")
+            if ratio > 1:
+                big_m = ratio * _max_abs(r1)
+                new += [prob.Constraint(a2 - ratio * a1 - big_m * z, lb=-big_m, name=f"remi_up_{rid}"),
+                        prob.Constraint(a2 - epsilon * z, lb=0, name=f"remi_on_{rid}")]
+            else:
+                big_m = _max_abs(r2)
+                new += [prob.Constraint(ratio * a1 - a2 - big_m * z, lb=-big_m, name=f"remi_down_{rid}"),
+                        prob.Constraint(a1 - epsilon * z, lb=0, name=f"remi_on_{rid}")]
+            new.append(z)
+            self.z[rid] = z
+        model.add_cons_vars(new, sloppy=True)
+
+        model.objective = prob.Objective(Zero, direction="max", sloppy=True)
+        model.objective.set_linear_coefficients({z: 1 for z in self.z.values()})
+        model.solver.configuration.tolerances.integrality = INTEGRALITY
+        if time_limit is not None:
+            model.solver.configuration.timeout = time_limit
+        self.n_cuts = 0
+
+    def _add_treated(self, treated):
+        twin = treated.copy()
+        for met in twin.metabolites:
+            met.id = PREFIX + met.id
+        for rxn in twin.reactions:
+            rxn.id = PREFIX + rxn.id
+        twin.repair()
+        reactions = list(twin.reactions)
+        twin.remove_reactions(reactions)
+        self.model.add_reactions(reactions)
+
+    def solve(self):
+        """``(score, consistent reaction ids, control fluxes, treated fluxes)``; None if not optimal."""
+        model = self.model
+        score = model.slim_optimize()
+        if model.solver.status != "optimal":
+            return None
+        primal = model.solver.primal_values
+        chosen = [rid for rid, z in self.z.items() if primal[z.name] > 0.5]
+
+        def net(ids, prefix):
+            return np.array([primal[prefix + rid] - primal[model.reactions.get_by_id(prefix + rid).reverse_id]
+                             for rid in ids])
+
+        return round(score), chosen, net(self.reaction_ids, ""), net(self.treated_ids, PREFIX)
+
+    def fix_score(self, score):
+        """Only accept solutions satisfying at least ``score`` regulations (REMI's MCS constraint)."""
+        prob = self.model.problem
+        self.model.add_cons_vars(prob.Constraint(sum(self.z.values()), lb=score, name="remi_mcs"))
+
+    def exclude(self, chosen):
+        """Integer cut ruling out exactly this set of satisfied regulations."""
+        chosen = set(chosen)
+        expr = (sum(z for rid, z in self.z.items() if rid in chosen)
+                - sum(z for rid, z in self.z.items() if rid not in chosen))
+        self.n_cuts += 1
+        self.model.add_cons_vars(self.model.problem.Constraint(
+            expr, ub=len(chosen) - 1, name=f"remi_cut_{self.n_cuts}"))
+
+    def alternatives(self, n=N_ALTERNATIVES):
+        """Up to ``n`` distinct optimal regulation sets, as REMI's findAltCombi.
+
+        The first solve gives the maximum consistency score; it is then
+        held fixed and each solution is cut off in turn. The solver
+        problem is kept between solves, so every re-solve starts from the
+        previous one.
+        """
+        first = self.solve()
+        if first is None:
+            return []
+        self.fix_score(first[0])
+        found = [first]
+        while len(found) < n:
+            self.exclude(found[-1][1])
+            nxt = self.solve()
+            if nxt is None or nxt[0] < first[0]:
+                break
+            found.append(nxt)
+        return found
+
+    def to_solutions(self, found):
+        """REMI-style solution matrix: NF_/PERTURB_NF_ net fluxes and the regulation binaries."""
+        names = ([f"NF_{rid}" for rid in self.reaction_ids] + [f"{PREFIX}NF_{rid}" for rid in self.treated_ids]
+                 + [f"REL_{rid}" for rid in self.z])
+        if not found:
+            return RemiSolutions(names, np.zeros((len(names), 0)))
+        columns = []
+        for _, chosen, control, treated in found:
+            chosen = set(chosen)
+            columns.append(np.concatenate([control, treated, [float(rid in chosen) for rid in self.z]]))
+        values = np.column_stack(columns)
+        values[np.abs(values) < TOL_ZERO] = 0.0
+        return RemiSolutions(names, values)
+
+
+def main():
+    # python remi.py <control model> <treated model> <up table> <down table> <out table> [n]
+    from model_cache import load_model
+    from table_io import read_table, write_table
+
+    control_path, treated_path, up_path, down_path, out_path = sys.argv[1:6]
+    n = int(sys.argv[6]) if len(sys.argv) > 6 else N_ALTERNATIVES
+    regulation = regulation_from_tables(read_table(up_path), read_table(down_path))
+    problem = RelExpProblem(load_model(control_path), load_model(treated_path), regulation)
+    found = problem.alternatives(n)
+    if found:
+        print(f"maximum consistency score {found[0][0]} of {len(problem.z)}, {len(found)} alternatives")
+    else:
+        print("no feasible solution")
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    write_table(problem.to_solutions(found).to_frame(), out_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+from scipy.io import loadmat
+
+
+class RemiSolutions:
+    """REMI alternative solutions: one row per MILP variable, one column per solution.
+
+    ``values[i, k]`` is variable ``var_names[i]`` in solution ``k``;
+    ``index`` maps stripped, upper-cased variable names to their first row.
+    """
+
+    def __init__(self, var_names, values, columns=None):
+        self.var_names = np.asarray(var_names, dtype=object)
+        self.values = np.asarray(values, dtype=float)
+        if self.values.ndim == 1:
+            self.values = self.values[:, None]
+        if len(self.var_names) != self.values.shape[0]:
+            raise ValueError(f"{len(self.var_names)} variable names for {self.values.shape[0]} solution rows")
+        self.columns = list(columns) if columns is not None else [str(k + 1) for k in range(self.values.shape[1])]
+        self._index = None
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = {}
+            for i, name in enumerate(self.var_names):
+                self._index.setdefault(str(name).strip().upper(), i)
+        return self._index
+
+    def rows(self, names):
+        """Row of each name (case-insensitive), -1 where it is missing."""
+        index = self.index
+        return np.array([index.get(str(name).strip().upper(), -1) for name in names], dtype=np.intp)
+
+    def to_frame(self):
+        """The sol.xlsx layout: VAR_NAMES followed by one column per solution."""
+        df = pd.DataFrame(self.values, columns=self.columns)
+        df.insert(0, 'VAR_NAMES', self.var_names)
+        return df
+
+
+def load_remi_solutions(path):
+    """Read ``model.varNames`` and ``sol_matrix`` from a REMI result .mat file."""
+    try:
+        mat = loadmat(path, variable_names=['model', 'sol_matrix'], squeeze_me=True, struct_as_record=False)
+    except Exception as e:
+        raise ValueError(f"cannot read REMI results from {path}: {e}") from e
+    if 'model' not in mat or 'sol_matrix' not in mat:
+        raise ValueError(f"{path} has no model/sol_matrix variables")
+    var_names = [str(name) for name in np.atleast_1d(mat['model'].varNames)]
+    return RemiSolutions(var_names, mat['sol_matrix'])
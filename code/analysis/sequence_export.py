@@ -0,0 +1,104 @@
+import json
+import os
+
+import pandas as pd
+from tqdm import tqdm
+
+
+def write_fasta_record(fh, header, seq, width=60):
+    fh.write(f">{header}\n")
+    for i in range(0, len(seq), width):
+        fh.write(seq[i:i+width] + "\n")
+
+
+def checkpoint_path(fasta_path):
+    return f"{fasta_path}.checkpoint"
+
+
+def rows_path(log_path):
+    return f"{log_path}.rows.jsonl"
+
+
+def read_checkpoint(path):
+    """``(done_items, fasta_offset, rows_offset, size)`` from a checkpoint file.
+
+    Each complete line is ``item, ok, fasta_offset, rows_offset`` (tab
+    separated), written after the item's output was flushed; ``size`` is the
+    byte length up to the last complete line, so a torn line is ignored.
+    """
+    done, fasta_offset, rows_offset, size = set(), 0, 0, 0
+    if not os.path.exists(path):
+        return done, fasta_offset, rows_offset, size
+    with open(path, "rb") as fh:
+        for raw in fh:
+            if not raw.endswith(b"\n"):
+                break
+            item, ok, fasta_offset, rows_offset = raw.decode("utf-8").rstrip("\n").split("\t")
+            fasta_offset, rows_offset = int(fasta_offset), int(rows_offset)
+            size += len(raw)
+            if ok == "1":
+                done.add(item)
+    return done, fasta_offset, rows_offset, size
+
+
+def pending_items(items, fasta_path):
+    done = read_checkpoint(checkpoint_path(fasta_path))[0]
+    return [item for item in items if item not in done]
+
+
+def _truncate(path, size):
+    mode = "r+b" if os.path.exists(path) else "wb"
+    with open(path, mode) as fh:
+        fh.truncate(size)
+
+
+def export_sequences(items, fetch, fasta_path, log_path, mapper=map, desc=None, resume=True):
+    """Fetch ``items`` and stream their FASTA records and log rows to disk.
+
+    ``fetch(item)`` returns ``(log_row, (header, seq) or None)`` and must
+    not raise. Records are appended to ``fasta_path`` and rows to a JSON
+    lines file next to ``log_path`` as each item finishes, followed by a
+    checkpoint line. On resume the outputs are truncated to the last
+    checkpoint and finished items are skipped; items whose row status
+    starts with "ERROR" are tried again. ``log_path`` is rewritten from the
+    rows at the end with one row per item (the latest).
+
+    Returns the log as a DataFrame.
+    """
+    ckpt = checkpoint_path(fasta_path)
+    rows_file = rows_path(log_path)
+    if resume:
+        done, fasta_offset, rows_offset, ckpt_size = read_checkpoint(ckpt)
+    else:
+        done, fasta_offset, rows_offset, ckpt_size = set(), 0, 0, 0
+    # drop anything written after the last complete checkpoint line
+    _truncate(ckpt, ckpt_size)
+    _truncate(fasta_path, fasta_offset)
+    _truncate(rows_file, rows_offset)
+
+    todo = [item for item in dict.fromkeys(items) if item not in done]
+    if done:
+        print(f"resuming: {len(done)} done, {len(todo)} left")
+
+    with open(fasta_path, "a", encoding="utf-8") as fw, \
+            open(rows_file, "a", encoding="utf-8") as fr, \
+            open(ckpt, "a", encoding="utf-8") as fc:
+        for item, (row, record) in tqdm(zip(todo, mapper(fetch, todo)), total=len(todo), desc=desc):
+            if record:
+                write_fasta_record(fw, *record)
+            fr.write(json.dumps([item, row]) + "\n")
+            fw.flush()
+            fr.flush()
+            ok = not str(row.get("status", "")).startswith("ERROR")
+            fc.write(f"{item}\t{int(ok)}\t{fw.tell()}\t{fr.tell()}\n")
+            fc.flush()
+
+    latest = {}
+    with open(rows_file, encoding="utf-8") as fr:
+        for line in fr:
+            item, row = json.loads(line)
+            latest.pop(item, None)
+            latest[item] = row
+    logs = pd.DataFrame(list(latest.values()))
+    logs.to_csv(log_path, index=False)
+    return logs
@@ -0,0 +1,157 @@
+import os
+from collections import defaultdict
+from itertools import combinations, product
+
+import numpy as np
+import pandas as pd
+
+from deletion_screen import iter_deletion_screen
+from gpr import is_blocked, parse_gpr, to_dnf
+from knockout import TOL_FLUX, optimize_wild_type, screen_knockouts
+from model_cache import load_model
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "model", "iCNG99.mat")
+OUT_CSV = "/mnt/NFS/fengch/new/models/paper/synthetic_lethal_pairs.csv"
+
+MAX_ORDER = 2          # 3 also screens triples
+GROWTH_TOL = 1e-6      # same cutoff as drug_target_test.py
+PROCESSES = 8
+CHUNK_SIZE = 256
+
+
+def gpr_index(model):
+    rules = {}
+    gene_reactions = defaultdict(set)
+    for rxn in model.reactions:
+        dnf = to_dnf(parse_gpr(rxn.gene_reaction_rule))
+        if dnf:
+            rules[rxn.id] = dnf
+            for gene_id in set().union(*dnf):
+                gene_reactions[gene_id].add(rxn.id)
+    return rules, gene_reactions
+
+
+def blocked_reactions(gene_ids, rules, gene_reactions):
+    knockouts = frozenset(gene_ids)
+    candidates = set().union(*(gene_reactions[g] for g in gene_ids))
+    return frozenset(r for r in candidates if is_blocked(rules[r], knockouts))
+
+
+def _interchangeable(a, b, reactions, rules):
+    swap = {a: b, b: a}
+    for rxn_id in reactions:
+        dnf = rules[rxn_id]
+        swapped = frozenset(frozenset(swap.get(g, g) for g in clause) for clause in dnf)
+        if swapped != dnf:
+            return False
+    return True
+
+
+def gene_classes(gene_ids, rules, gene_reactions):
+    """Group genes that every GPR treats identically.
+
+    Genes in one class touch the same reactions and can be swapped in each
+    of their rules without changing it, so any knockout set scores the same
+    whichever members it uses.
+    """
+    by_reactions = defaultdict(list)
+    for gene_id in gene_ids:
+        by_reactions[frozenset(gene_reactions[gene_id])].append(gene_id)
+
+    classes = []
+    for reactions, members in by_reactions.items():
+        groups = []
+        for gene_id in members:
+            for group in groups:
+                if _interchangeable(group[0], gene_id, reactions, rules):
+                    group.append(gene_id)
+                    break
+            else:
+                groups.append([gene_id])
+        classes.extend(groups)
+    return classes
+
+
+def _expand(classes, combo):
+    counts = defaultdict(int)
+    for c in combo:
+        counts[c] += 1
+    choices = [list(combinations(classes[c], n)) for c, n in sorted(counts.items())]
+    for picked in product(*choices):
+        yield tuple(g for group in picked for g in group)
+
+
+def synthetic_lethal_screen(model_path, max_order=MAX_ORDER, growth_tol=GROWTH_TOL,
+                            processes=PROCESSES, chunk_size=CHUNK_SIZE):
+    model = load_model(model_path)
+    wt_value, wt_fluxes = optimize_wild_type(model)
+    if wt_fluxes is None:
+        raise RuntimeError(f"wild type of {model_path} is infeasible")
+    rules, gene_reactions = gpr_index(model)
+    print(f"wild type: {wt_value}")
+
+    def lethal(value):
+        return np.isnan(value) or value < growth_tol
+
+    genes = sorted(g for g in gene_reactions if gene_reactions[g])
+    single_blocked = {g: blocked_reactions([g], rules, gene_reactions) for g in genes}
+    single_values = screen_knockouts(model, [tuple(single_blocked[g]) for g in genes],
+                                     kind="reaction", wild_type=(wt_value, wt_fluxes))
+    essential = {g for g, v in zip(genes, single_values) if lethal(v)}
+    print(f"{len(genes)} genes with GPRs, {len(essential)} essential")
+
+    classes = gene_classes([g for g in genes if g not in essential], rules, gene_reactions)
+    print(f"{len(classes)} interchangeable gene classes")
+
+    rows = []
+    lethal_combos = set()
+    for order in range(2, max_order + 1):
+        # within a class only the number of members used matters
+        slots = [c for c, members in enumerate(classes) for _ in members[:order]]
+        combos, tasks = [], {}
+        n_total = n_skipped = 0
+        for combo in sorted(set(combinations(slots, order))):
+            n_total += 1
+            if any(sub in lethal_combos for k in range(2, order)
+                   for sub in combinations(combo, k)):
+                n_skipped += 1
+                continue
+            gene_ids = next(_expand(classes, combo))
+            blocked = blocked_reactions(gene_ids, rules, gene_reactions)
+            if any(blocked == single_blocked[g] for g in gene_ids):
+                n_skipped += 1
+                continue
+            if all(abs(wt_fluxes[r]) <= TOL_FLUX for r in blocked):
+                n_skipped += 1
+                continue
+            combos.append((combo, blocked))
+            tasks.setdefault(blocked, None)
+
+        print(f"order {order}: {n_total} class combinations, {n_skipped} pruned, "
+              f"{len(tasks)} LPs")
+        keys = [tuple(sorted(b)) for b in tasks]
+        for key, value in iter_deletion_screen(model_path, keys, kind="reaction",
+                                               processes=processes, chunk_size=chunk_size):
+            tasks[frozenset(key)] = value
+
+        for combo, blocked in combos:
+            value = tasks[blocked]
+            if not lethal(value):
+                continue
+            lethal_combos.add(combo)
+            for gene_ids in _expand(classes, combo):
+                rows.append({"Genes": " + ".join(gene_ids), "Order": order,
+                             "Knockout Objective Value": value})
+
+    return pd.DataFrame(rows, columns=["Genes", "Order", "Knockout Objective Value"])
+
+
+def main():
+    res = synthetic_lethal_screen(MODEL_PATH)
+    print(f"synthetic lethal combinations: {len(res)}")
+    os.makedirs(os.path.dirname(OUT_CSV), exist_ok=True)
+    res.to_csv(OUT_CSV, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import os
+import warnings
+
+import pandas as pd
+
+# format for tables handed from one stage to the next; Excel stays
+# available as a report copy (write_table(..., excel=True))
+TABLE_FORMAT = os.environ.get("ICNG99_TABLE_FORMAT", "parquet")
+COLUMNAR = (".parquet", ".feather")
+EXCEL = (".xlsx", ".xls")
+TEXT = (".csv", ".tsv", ".txt")
+# where read_table looks when the exact path does not exist
+FALLBACK_EXTS = COLUMNAR + (".xlsx", ".csv")
+
+_warned = set()
+
+
+def _ext(path):
+    return os.path.splitext(path)[1].lower()
+
+
+def _has_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def table_path(path, fmt=TABLE_FORMAT):
+    """``path`` with its extension replaced by the one for ``fmt``."""
+    return f"{os.path.splitext(path)[0]}.{fmt.lstrip('.')}"
+
+
+def find_table(path, fallback=None):
+    """``path`` if it exists, else None.
+
+    With ``fallback`` (the default for paths without an extension) the
+    same stem is tried as .parquet, .feather, .xlsx and .csv, in that order.
+    """
+    if os.path.exists(path):
+        return path
+    if fallback is None:
+        fallback = not _ext(path)
+    if not fallback:
+        return None
+    for ext in FALLBACK_EXTS:
+        candidate = table_path(path, ext)
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def read_table(path, sheet_name=0, fallback=None):
+    """Read a Parquet, Feather, Excel or delimited text table.
+
+    The format follows the extension. A path without an extension (or
+    ``fallback=True``) is looked up as .parquet, .feather, .xlsx and .csv,
+    so readers keep working whichever format the previous stage wrote;
+    the file actually read is printed.
+    """
+    found = find_table(path, fallback)
+    if found is None:
+        tried = f" (also tried {', '.join(FALLBACK_EXTS)})" if fallback or not _ext(path) else ""
+        raise FileNotFoundError(f"no table at {path}{tried}")
+    if found != path:
+        print(f"reading {found} for {path}")
+    ext = _ext(found)
+    if ext == ".parquet":
+        return pd.read_parquet(found)
+    if ext == ".feather":
+        return pd.read_feather(found)
+    if ext in EXCEL:
+        return pd.read_excel(found, sheet_name=sheet_name)
+    sep = "\t" if ext in (".tsv", ".txt") else ","
+    return pd.read_csv(found, sep=sep)
+
+
+def _columnar_frame(df):
+    # parquet/feather need string column names and a default index
+    df = df.reset_index(drop=True)
+    df.columns = [str(c) for c in df.columns]
+    return df
+
+
+def write_table(df, path, excel=False):
+    """Write ``df`` to ``path`` (format by extension, without the index); return the path written.
+
+    A path without an extension gets TABLE_FORMAT's. Without pyarrow,
+    Parquet/Feather paths are written as .xlsx instead (read_table finds
+    them when given the stem). With ``excel`` an .xlsx copy is written
+    next to a columnar table for reporting.
+    """
+    if not _ext(path):
+        path = table_path(path)
+    ext = _ext(path)
+    if ext in COLUMNAR and not _has_pyarrow():
+        if ext not in _warned:
+            warnings.warn(f"pyarrow is not installed, writing {ext} tables as .xlsx")
+            _warned.add(ext)
+        path, ext = table_path(path, "xlsx"), ".xlsx"
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if ext == ".parquet":
+        _columnar_frame(df).to_parquet(path, index=False)
+    elif ext == ".feather":
+        _columnar_frame(df).to_feather(path)
+    elif ext in EXCEL:
+        df.to_excel(path, index=False)
+    elif ext in TEXT:
+        df.to_csv(path, sep="\t" if ext in (".tsv", ".txt") else ",", index=False)
+    else:
+        raise ValueError(f"unknown table format for {path}")
+
+    if excel and ext not in EXCEL:
+        df.to_excel(table_path(path, "xlsx"), index=False)
+    return path
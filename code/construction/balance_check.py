@@ -0,0 +1,183 @@
+import re
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from cobra.io import read_sbml_model
+from scipy import sparse
+
+MODEL_PATH = '/mnt/NFS/fengch/new/models/merge40001_noc.xml'
+ATOM_REPORT = '/mnt/NFS/fengch/atom_merge40001_noc.xlsx'
+CHARGE_REPORT = '/mnt/NFS/fengch/charge_merge40001_noc.xlsx'
+TOL = 1e-9             # S^T E totals closer than this count as equal in the prefilter
+
+_ELEMENT = re.compile(r'([A-Z][a-z]*)(\d*)')
+
+
+def parse_formula(formula):
+    elements = Counter()
+    for element, count in _ELEMENT.findall(formula):
+        elements[element] += int(count) if count else 1
+    return elements
+
+
+def stoichiometric_matrix(model):
+    """Sparse S (metabolites x reactions) in model order."""
+    met_index = {met: i for i, met in enumerate(model.metabolites)}
+    rows, cols, vals = [], [], []
+    for j, rxn in enumerate(model.reactions):
+        for met, coeff in rxn.metabolites.items():
+            rows.append(met_index[met])
+            cols.append(j)
+            vals.append(coeff)
+    shape = (len(model.metabolites), len(model.reactions))
+    return sparse.csc_matrix((vals, (rows, cols)), shape=shape)
+
+
+def element_matrix(metabolites):
+    """``(E, elements, parsed)``: metabolites x elements counts, each formula parsed once.
+
+    Metabolites without a formula get an empty row; ``parsed`` maps each
+    formula to its element Counter.
+    """
+    parsed = {}
+    columns = {}
+    rows, cols, vals = [], [], []
+    for i, met in enumerate(metabolites):
+        if not met.formula:
+            continue
+        if met.formula not in parsed:
+            parsed[met.formula] = parse_formula(met.formula)
+        for element, count in parsed[met.formula].items():
+            rows.append(i)
+            cols.append(columns.setdefault(element, len(columns)))
+            vals.append(count)
+    E = sparse.csr_matrix((vals, (rows, cols)), shape=(len(metabolites), len(columns)), dtype=float)
+    return E, list(columns), parsed
+
+
+def charge_vector(metabolites):
+    # missing charges contribute nothing, as in the old per-reaction loop
+    return np.array([0.0 if met.charge is None else met.charge for met in metabolites], dtype=float)
+
+
+def _split_sides(S):
+    # reactant (consumed, as positive amounts) and product sides of S
+    reactants, products = -S.minimum(0), S.maximum(0)
+    reactants.eliminate_zeros()
+    products.eliminate_zeros()
+    return reactants, products
+
+
+def _fractional(S):
+    # reactions with a non-integer coefficient: their matrix sums may round
+    # differently from the per-reaction sums, so they are always rechecked
+    frac = abs(S) - abs(S).floor()
+    frac.eliminate_zeros()
+    return frac.getnnz(axis=0) > 0
+
+
+def charge_totals(reaction):
+    reactant_charge = 0
+    product_charge = 0
+    for met, coeff in reaction.metabolites.items():
+        if met.charge is not None:
+            if coeff < 0:
+                reactant_charge += met.charge * abs(coeff)
+            else:
+                product_charge += met.charge * coeff
+    return reactant_charge, product_charge
+
+
+def element_totals(reaction, parsed):
+    reactant_elements = Counter()
+    product_elements = Counter()
+    for met, coeff in reaction.metabolites.items():
+        if met.formula:
+            elements_count = parsed.get(met.formula) or parse_formula(met.formula)
+            if coeff < 0:
+                reactant_elements += Counter({el: count * -coeff for el, count in elements_count.items()})
+            else:
+                product_elements += Counter({el: count * coeff for el, count in elements_count.items()})
+    return reactant_elements, product_elements
+
+
+def atom_imbalances(model, S=None):
+    """Report of reactions whose reactant and product element totals differ.
+
+    All reactions are checked at once from S^T E, per side; the element
+    dictionaries, which decide the verdict, are only built for the
+    reactions that differ there or have fractional coefficients.
+    """
+    if S is None:
+        S = stoichiometric_matrix(model)
+    E, _, parsed = element_matrix(model.metabolites)
+    reactants, products = _split_sides(S)
+    differs = abs(reactants.T @ E - products.T @ E).max(axis=1).toarray().ravel() > TOL
+    unbalanced = np.flatnonzero(differs | _fractional(S))
+
+    rows = []
+    for j in unbalanced:
+        reaction = model.reactions[int(j)]
+        reactant_elements, product_elements = element_totals(reaction, parsed)
+        if reactant_elements == product_elements:
+            continue
+        difference = Counter(reactant_elements)
+        for element, count in product_elements.items():
+            difference[element] -= count
+        rows.append({
+            'Reaction ID': reaction.id,
+            'Reactant Elements': dict(reactant_elements),
+            'Product Elements': dict(product_elements),
+            'Element Difference': dict(difference),
+        })
+    return pd.DataFrame(rows)
+
+
+def charge_imbalances(model, S=None):
+    """Report of reactions whose reactant and product total charges differ.
+
+    Reactions with fractional coefficients are summed per reaction as
+    before, so their verdict does not depend on the matrix summation order.
+    """
+    if S is None:
+        S = stoichiometric_matrix(model)
+    q = charge_vector(model.metabolites)
+    reactants, products = _split_sides(S)
+    reactant_charge = reactants.T @ q
+    product_charge = products.T @ q
+    for j in np.flatnonzero(_fractional(S)):
+        reactant_charge[j], product_charge[j] = charge_totals(model.reactions[int(j)])
+    unbalanced = np.flatnonzero(reactant_charge != product_charge)
+    return pd.DataFrame({
+        'Reaction ID': [model.reactions[int(j)].id for j in unbalanced],
+        'Reactant Total Charge': reactant_charge[unbalanced],
+        'Product Total Charge': product_charge[unbalanced],
+    })
+
+
+def balance_report(model):
+    """``(atom_df, charge_df)`` from one stoichiometric matrix."""
+    S = stoichiometric_matrix(model)
+    return atom_imbalances(model, S), charge_imbalances(model, S)
+
+
+def write_atom_report(df, path):
+    df.to_excel(path, index=False)
+
+
+def write_charge_report(df, path):
+    with pd.ExcelWriter(path) as writer:
+        df.to_excel(writer, sheet_name='Charge Unbalanced Reactions', index=False)
+
+
+def main():
+    model = read_sbml_model(MODEL_PATH)
+    atom_df, charge_df = balance_report(model)
+    write_atom_report(atom_df, ATOM_REPORT)
+    write_charge_report(charge_df, CHARGE_REPORT)
+    print(f"{len(atom_df)} atom-unbalanced, {len(charge_df)} charge-unbalanced reactions")
+
+
+if __name__ == "__main__":
+    main()
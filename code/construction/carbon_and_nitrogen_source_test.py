@@ -1,6 +1,13 @@
-import cobra
+import os
+import sys
+
 import pandas as pd
 
+from medium_screen import medium_conditions, screen_media
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "analysis"))
+from model_cache import load_model
+
 # Alternative nitrogen sources
 exchange_reactions_group1 = []
 exchange_reactions_group2 = ['EX_040', 'EX_111', 'EX_112', 'EX_113', 'EX_114','EX_115','EX_116','EX_117','EX_118','EX_119','EX_120','EX_121','EX_122','EX_123','EX_124','EX_125','EX_126','EX_127','EX_128','EX_129','EX_130']
@@ -9,75 +16,33 @@ fixed_reaction_id = 'EX_015'
 biomass1_reaction_id = 'biomass2_c' # with capsule
 biomass2_reaction_id = 'biomass1_c' # no capsule
 
-results = []
-
-for i in range(len(exchange_reactions_group1)):
-    print(f"Starting iteration {i + 1} for Group 1 (biomass1)...")
-
-    model = cobra.io.read_sbml_model('/mnt/NFS/fengch/new/models/mergemodeltest40001.xml')
-    model.solver = 'cplex'
-
-    current_reaction_id = exchange_reactions_group1[i]
-    
-    reaction = model.reactions.get_by_id(current_reaction_id)
-    reaction.lower_bound = -1000
-    reaction.upper_bound = 1000
-
-    fixed_reaction = model.reactions.get_by_id(fixed_reaction_id)
-    fixed_reaction.lower_bound = 0
-    fixed_reaction.upper_bound = 0
-
-    target_reaction = model.reactions.get_by_id(biomass1_reaction_id)
-    model.objective = target_reaction
-    model.objective_direction = 'max'
-
-    solution = model.optimize()
+PROCESSES = 1
 
-    results.append({
-        'Iteration': i + 1,
-        'Group': 'Group 1',
-        'Modified_Reaction': current_reaction_id,
-        'Fixed_Reaction': fixed_reaction_id,
-        'Objective_Function': biomass1_reaction_id,
-        'Optimized_Value': solution.objective_value
-    })
+model = load_model('/mnt/NFS/fengch/new/models/mergemodeltest40001.xml')
+model.solver = 'cplex'
 
-    print(f'Iteration {i + 1} - {current_reaction_id} and {fixed_reaction_id} modified:')
-    print('Optimized value:', solution.objective_value)
-
-for i in range(len(exchange_reactions_group2)):
-    print(f"Starting iteration {i + 1} for Group 2 (biomass2)...")
-
-    model = cobra.io.read_sbml_model('/mnt/NFS/fengch/new/models/mergemodeltest40001.xml')
-    model.solver = 'cplex'
-
-    current_reaction_id = exchange_reactions_group2[i]
-
-    reaction = model.reactions.get_by_id(current_reaction_id)
-    reaction.lower_bound = -1000
-    reaction.upper_bound = 1000
-
-    fixed_reaction = model.reactions.get_by_id(fixed_reaction_id)
-    fixed_reaction.lower_bound = 0
-    fixed_reaction.upper_bound = 0
-
-    target_reaction = model.reactions.get_by_id(biomass2_reaction_id)
-    model.objective = target_reaction
-    model.objective_direction = 'max'
-
-    solution = model.optimize()
-
-    results.append({
-        'Iteration': i + 1,
-        'Group': 'Group 2',
-        'Modified_Reaction': current_reaction_id,
-        'Fixed_Reaction': fixed_reaction_id,
-        'Objective_Function': biomass2_reaction_id,
-        'Optimized_Value': solution.objective_value
-    })
+results = []
 
-    print(f'Iteration {i + 1} - {current_reaction_id} and {fixed_reaction_id} modified:')
-    print('Optimized value:', solution.objective_value)
+for group, exchange_ids, objective in [('Group 1', exchange_reactions_group1, biomass1_reaction_id),
+                                       ('Group 2', exchange_reactions_group2, biomass2_reaction_id)]:
+    if not exchange_ids:
+        continue
+    print(f"Starting {len(exchange_ids)} conditions for {group} ({objective})...")
+
+    conditions = medium_conditions(exchange_ids, fixed={fixed_reaction_id: (0, 0)})
+    res = screen_media(model, conditions, objective=objective, processes=PROCESSES)
+
+    for i, row in res.iterrows():
+        results.append({
+            'Iteration': i + 1,
+            'Group': group,
+            'Modified_Reaction': row['Condition'],
+            'Fixed_Reaction': fixed_reaction_id,
+            'Objective_Function': objective,
+            'Optimized_Value': row['Optimized_Value']
+        })
+        print(f"Iteration {i + 1} - {row['Condition']} and {fixed_reaction_id} modified:")
+        print('Optimized value:', row['Optimized_Value'])
 
 df_results = pd.DataFrame(results)
 
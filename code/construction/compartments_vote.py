@@ -1,46 +1,93 @@
-import pandas as pd
-from collections import Counter
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
+import pandas as pd
+
+LOCATION_DIR = '/mnt/NFS/fengch/new/location'
+OUTPUT_FILE = os.path.join(LOCATION_DIR, 'locationcombined_sorted.xlsx')
+
+# (file, votes per predicted location, supplementary); a supplementary
+# predictor only adds votes to proteins the other predictors cover
+PREDICTORS = [
+    ('deeploc.xlsx', 1, False),
+    ('yloc.xlsx', 1, False),
+    ('wolf.xlsx', 1, False),
+    ('yloc2.xlsx', 0.5, True),
+]
+PROCESSES = 4
+
+
+def read_tables(paths, processes=PROCESSES):
+    if processes is None or processes <= 1 or len(paths) <= 1:
+        return [pd.read_excel(p) for p in paths]
+    with ProcessPoolExecutor(min(processes, len(paths))) as pool:
+        return list(pool.map(pd.read_excel, paths))
+
+
+def long_votes(df, weight):
+    """(protein, location, weight) rows in row-major order of a predictor table.
+
+    The first column is the protein, every other column one predicted
+    location; empty cells are dropped.
+    """
+    proteins = df.iloc[:, 0].to_numpy(dtype=object)
+    locations = df.iloc[:, 1:].to_numpy(dtype=object)
+    long = pd.DataFrame({
+        'Protein': np.repeat(proteins, locations.shape[1]),
+        'Location': locations.ravel(),
+    })
+    long = long[long['Location'].notna() & (long['Location'] != '')]
+    long['Weight'] = weight
+    return long
+
+
+def vote(tables, weights, supplementary):
+    """Per-protein location votes, sorted by votes.
 
-df1 = pd.read_excel('/mnt/NFS/fengch/new/location/deeploc.xlsx')
-df2 = pd.read_excel('/mnt/NFS/fengch/new/location/yloc.xlsx')
-df3 = pd.read_excel('/mnt/NFS/fengch/new/location/wolf.xlsx')
-df4 = pd.read_excel('/mnt/NFS/fengch/new/location/yloc2.xlsx')  # 0.5
+    Returns a long frame (Protein, Location, Votes) with proteins in order
+    of first appearance in the main tables and, within a protein,
+    locations by descending votes, ties in order of first appearance.
+    """
+    main = [t for t, s in zip(tables, supplementary) if not s]
+    proteins = pd.unique(pd.concat([t.iloc[:, 0] for t in main], ignore_index=True))
+    proteins = proteins[pd.notna(proteins)]
+    rank = pd.Series(np.arange(len(proteins)), index=proteins)
 
-final_results = {}
+    parts = [long_votes(t, w) for t, w in zip(tables, weights)]
+    long = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=['Protein', 'Location', 'Weight'])
+    long = long[long['Protein'].isin(rank.index)]
+    long['Order'] = np.arange(len(long))
 
-for df in [df1, df2, df3]:
-    for index, row in df.iterrows():
-        protein_name = row[0]
-        locations = row[1:]
+    votes = long.groupby(['Protein', 'Location'], sort=False).agg(
+        Votes=('Weight', 'sum'), First=('Order', 'min')).reset_index()
+    votes['Rank'] = rank.reindex(votes['Protein']).to_numpy()
+    votes = votes.sort_values(['Rank', 'Votes', 'First'], ascending=[True, False, True], kind='stable')
+    return votes[['Protein', 'Location', 'Votes']].reset_index(drop=True), proteins
 
-        if protein_name not in final_results:
-            final_results[protein_name] = Counter()
 
-        for location in locations:
-            if pd.isnull(location) or location == '':
-                continue
-            final_results[protein_name][location] += 1
+def wide_layout(votes, proteins):
+    """One row per protein: name, then location/votes pairs as in locationcombined_sorted.xlsx."""
+    pos = votes.groupby('Protein', sort=False).cumcount().to_numpy()
+    rows = pd.Series(np.arange(len(proteins)), index=proteins).reindex(votes['Protein']).to_numpy()
+    width = int(pos.max()) + 1 if len(pos) else 0
 
-for index, row in df4.iterrows():
-    protein_name = row[0]
-    locations = row[1:]
-    if protein_name in final_results:
-        for location in locations:
-            if pd.isnull(location) or location == '':
-                continue
-            final_results[protein_name][location] += 0.5
+    table = np.full((len(proteins), 1 + 2 * width), None, dtype=object)
+    table[:, 0] = proteins
+    table[rows, 1 + 2 * pos] = votes['Location'].to_numpy(dtype=object)
+    table[rows, 2 + 2 * pos] = votes['Votes'].to_numpy(dtype=object)
 
-sorted_final_list = []
-for protein_name, votes in final_results.items():
-    sorted_votes = sorted(votes.items(), key=lambda x: x[1], reverse=True)
-    row_data = [protein_name] + [item for sublist in sorted_votes for item in sublist]
-    sorted_final_list.append(row_data)
+    # header numbering kept exactly as the file has always been written
+    columns = ['Protein'] + [f'Location{i // 2 + 1}' if i % 2 == 0 else f'Votes{i // 2 + 1}' for i in range(1, 1 + 2 * width)]
+    return pd.DataFrame(table, columns=columns)
 
-max_columns = max(len(r) for r in sorted_final_list)
 
-columns = ['Protein'] + [f'Location{i // 2 + 1}' if i % 2 == 0 else f'Votes{i // 2 + 1}' for i in range(1, max_columns)]
+def main():
+    files, weights, supplementary = zip(*PREDICTORS)
+    tables = read_tables([os.path.join(LOCATION_DIR, f) for f in files])
+    votes, proteins = vote(tables, weights, supplementary)
+    wide_layout(votes, proteins).to_excel(OUTPUT_FILE, index=False)
 
-sorted_results_df = pd.DataFrame(sorted_final_list, columns=columns)
 
-sorted_results_df.to_excel('/mnt/NFS/fengch/new/location/locationcombined_sorted.xlsx', index=False)
+if __name__ == "__main__":
+    main()
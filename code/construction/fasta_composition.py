@@ -0,0 +1,105 @@
+import numpy as np
+
+CHUNK_SIZE = 1 << 24
+
+_WHITESPACE = np.zeros(256, dtype=bool)
+_WHITESPACE[list(b" \t\n\r\x0b\x0c")] = True
+_UPPER = np.arange(256)
+_UPPER[ord("a"):ord("z") + 1] -= 32
+_UNSEEN = np.iinfo(np.int64).max
+
+
+def iter_line_blocks(path, chunk_size=CHUNK_SIZE):
+    """Read ``path`` in binary chunks cut at line ends."""
+    with open(path, "rb") as fh:
+        rest = b""
+        while True:
+            data = fh.read(chunk_size)
+            if not data:
+                if rest:
+                    yield rest
+                return
+            data = rest + data
+            cut = data.rfind(b"\n") + 1
+            if cut:
+                yield data[:cut]
+            rest = data[cut:]
+
+
+def _fold_upper(counts):
+    folded = np.zeros_like(counts)
+    np.add.at(folded, _UPPER, counts)
+    return folded
+
+
+def fasta_composition(path, uppercase=False, per_record=False, chunk_size=CHUNK_SIZE):
+    """Symbol counts of all sequence lines in a FASTA file.
+
+    The file is read in large chunks and each chunk is counted with one
+    ``np.bincount``; header lines and whitespace are skipped. Returns
+    ``(counts, records)``: ``counts`` maps each symbol to its count in
+    order of first appearance, ``records`` is ``[(header, counts), ...]``
+    per record if ``per_record`` is set, else ``None``. Sequence before
+    the first header only enters the global counts.
+    """
+    counts = np.zeros(256, dtype=np.int64)
+    first_seen = np.full(256, _UNSEEN)
+    seen_so_far = 0
+    names, record_rows = [], []
+
+    for block in iter_line_blocks(path, chunk_size):
+        arr = np.frombuffer(block, dtype=np.uint8)
+        newline = arr == ord("\n")
+        line_id = np.cumsum(newline) - newline
+        starts = np.concatenate(([0], np.flatnonzero(newline[:-1]) + 1))
+        is_header = arr[starts] == ord(">")
+        keep = ~is_header[line_id] & ~_WHITESPACE[arr]
+
+        symbols = arr[keep]
+        block_counts = np.bincount(symbols, minlength=256)
+        for s in np.flatnonzero((block_counts > 0) & (first_seen == _UNSEEN)):
+            first_seen[s] = seen_so_far + int(np.argmax(symbols == s))
+        counts += block_counts
+        seen_so_far += len(symbols)
+
+        if per_record:
+            header_starts = starts[is_header]
+            line_ends = np.append(np.flatnonzero(newline), len(arr))
+            for start in header_starts:
+                end = line_ends[np.searchsorted(line_ends, start)]
+                names.append(arr[start + 1:end].tobytes().decode().strip())
+            # record index of every kept byte; -1 before the first header
+            marks = np.zeros(len(arr), dtype=np.int64)
+            marks[header_starts] = 1
+            first = len(record_rows) - 1
+            record = (np.cumsum(marks) + first)[keep]
+            record_rows.extend(np.zeros(256, dtype=np.int64) for _ in header_starts)
+            inside = record >= 0
+            if inside.any():
+                lo = int(record[inside][0])
+                per = np.bincount((record[inside] - lo) * 256 + symbols[inside],
+                                  minlength=(len(record_rows) - lo) * 256).reshape(-1, 256)
+                for k, row in enumerate(per):
+                    record_rows[lo + k] += row
+
+    if uppercase:
+        counts = _fold_upper(counts)
+        seen = np.full(256, _UNSEEN)
+        np.minimum.at(seen, _UPPER, first_seen)
+        first_seen = seen
+        record_rows = [_fold_upper(row) for row in record_rows]
+
+    order = [s for s in np.argsort(first_seen, kind="stable") if counts[s] > 0]
+    total = {chr(s): int(counts[s]) for s in order}
+    if not per_record:
+        return total, None
+    records = [(name, {chr(s): int(row[s]) for s in order if row[s]})
+               for name, row in zip(names, record_rows)]
+    return total, records
+
+
+def ratios(counts, digits=None):
+    total = sum(counts.values())
+    if digits is None:
+        return {symbol: count / total for symbol, count in counts.items()}
+    return {symbol: round(count / total, digits) for symbol, count in counts.items()}
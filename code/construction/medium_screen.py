@@ -0,0 +1,75 @@
+from itertools import combinations
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+OPEN_BOUNDS = (-1000, 1000)
+CHUNK_SIZE = 16
+
+_worker = {}
+
+
+def medium_conditions(exchange_ids, fixed=None, open_bounds=OPEN_BOUNDS, order=1):
+    """``(label, {reaction_id: (lb, ub)})`` for every combination of opened exchanges.
+
+    ``order=2`` adds all pairwise combinations to the single ones; ``fixed``
+    bounds are applied in every condition.
+    """
+    fixed = dict(fixed or {})
+    conditions = []
+    for k in range(1, order + 1):
+        for combo in combinations(exchange_ids, k):
+            changes = {rxn_id: tuple(open_bounds) for rxn_id in combo}
+            changes.update(fixed)
+            conditions.append(("+".join(combo), changes))
+    return conditions
+
+
+def _init_worker(model, objective):
+    if objective is not None:
+        model.objective = objective
+        model.objective_direction = "max"
+    _worker["model"] = model
+
+
+def _run_condition(condition):
+    model = _worker["model"]
+    label, changes = condition
+    with model:
+        for rxn_id, bounds in changes.items():
+            model.reactions.get_by_id(rxn_id).bounds = bounds
+        value = model.slim_optimize(error_value=np.nan)
+        status = model.solver.status
+    return label, value, status
+
+
+def screen_media(model, conditions, objective=None, processes=1, chunk_size=CHUNK_SIZE):
+    """Optimize ``model`` under each condition and return one row per condition.
+
+    Conditions are applied as bound changes inside a model context on a
+    single loaded model, so the LP is built once and every solve starts
+    from the previous basis. With ``processes > 1`` each worker receives
+    one copy of the model and works through chunks of conditions.
+    """
+    conditions = list(conditions)
+    if processes is None or processes <= 1:
+        with model:
+            _init_worker(model, objective)
+            results = [_run_condition(c) for c in conditions]
+        _worker.clear()
+    else:
+        with Pool(processes, initializer=_init_worker, initargs=(model, objective)) as pool:
+            results = pool.map(_run_condition, conditions, chunksize=chunk_size)
+
+    if objective is not None:
+        objective_name = getattr(objective, "id", objective)
+    else:
+        objective_name = str(model.objective.expression)
+    return pd.DataFrame({
+        "Condition": [label for label, _, _ in results],
+        "Changed_Reactions": [", ".join(changes) for _, changes in conditions],
+        "Objective_Function": objective_name,
+        "Optimized_Value": [value for _, value, _ in results],
+        "Status": [status for _, _, status in results],
+    })
@@ -0,0 +1,107 @@
+import os
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+CXCALC = os.environ.get("CXCALC", "cxcalc")
+PH = 7.2
+PROCESSES = 8
+CHUNK_SIZE = 64
+
+
+def _unique_structures(values):
+    return list(dict.fromkeys(v for v in values if isinstance(v, str) and v.strip()))
+
+
+def _cxcalc_command(cxcalc, ph, structure_or_file):
+    return [cxcalc, "majormicrospecies", "-H", str(ph), structure_or_file]
+
+
+def _cxcalc_batch(structures, cxcalc, ph):
+    # one cxcalc run over a file with one structure per line; None unless
+    # it prints exactly one result line per input line
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as fh:
+        fh.write("\n".join(structures) + "\n")
+        path = fh.name
+    try:
+        result = subprocess.run(_cxcalc_command(cxcalc, ph, path), stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, universal_newlines=True)
+    except OSError:
+        return None
+    finally:
+        os.remove(path)
+    lines = result.stdout.splitlines()
+    if result.returncode != 0 or len(lines) != len(structures):
+        return None
+    return dict(zip(structures, (line.strip() for line in lines)))
+
+
+def _cxcalc_one(args):
+    structure, cxcalc, ph = args
+    try:
+        result = subprocess.run(_cxcalc_command(cxcalc, ph, structure), check=True, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, universal_newlines=True)
+    except subprocess.CalledProcessError as e:
+        print(f"Error executing command for SMILES {structure}: {e.stderr.strip()}")
+        return ""
+    except OSError as e:
+        # cxcalc missing or not executable
+        print(f"Error executing command for SMILES {structure}: {e}")
+        return ""
+    return result.stdout.strip()
+
+
+def major_microspecies(structures, ph=PH, cxcalc=CXCALC, processes=PROCESSES):
+    """Major microspecies at ``ph`` for each structure, as ``{structure: result}``.
+
+    Distinct structures are written to one file and sent through a single
+    cxcalc call. If that fails or its output cannot be matched line by
+    line, each structure gets its own cxcalc call on a pool of
+    ``processes`` threads. Failed structures map to ''.
+    """
+    unique = _unique_structures(structures)
+    if not unique:
+        return {}
+    results = _cxcalc_batch(unique, cxcalc, ph)
+    if results is not None:
+        return results
+    with ThreadPoolExecutor(max(1, processes)) as pool:
+        return dict(zip(unique, pool.map(_cxcalc_one, [(s, cxcalc, ph) for s in unique])))
+
+
+def molecular_details_from_inchi(inchi):
+    from rdkit import Chem
+    from rdkit.Chem import rdMolDescriptors
+
+    mol = Chem.MolFromInchi(inchi)
+    if mol is None:
+        return 'Invalid InChI', 0
+    chemical_formula = rdMolDescriptors.CalcMolFormula(mol)
+    net_charge = sum(atom.GetFormalCharge() for atom in mol.GetAtoms())
+    return chemical_formula, net_charge
+
+
+def molecular_details(inchis, processes=PROCESSES, chunk_size=CHUNK_SIZE):
+    """``{inchi: (formula, net_charge)}``, each distinct InChI parsed once."""
+    unique = _unique_structures(inchis)
+    if processes is None or processes <= 1 or len(unique) <= chunk_size:
+        return {inchi: molecular_details_from_inchi(inchi) for inchi in unique}
+    with ProcessPoolExecutor(processes) as pool:
+        return dict(zip(unique, pool.map(molecular_details_from_inchi, unique, chunksize=chunk_size)))
+
+
+def add_major_microspecies(df, column='InChI', ph=PH, cxcalc=CXCALC, processes=PROCESSES):
+    results = major_microspecies(df[column], ph=ph, cxcalc=cxcalc, processes=processes)
+    df['MajorMicrospecies'] = [results.get(v, '') if isinstance(v, str) else '' for v in df[column]]
+    return df
+
+
+def add_molecular_details(df, column='MajorMicrospecies', processes=PROCESSES):
+    details = molecular_details(df[column], processes=processes)
+    invalid = ('Invalid InChI', 0)
+    pairs = [details.get(v, invalid) if pd.notnull(v) and isinstance(v, str) else invalid for v in df[column]]
+    df['Chemical_Formula'] = [formula for formula, _ in pairs]
+    df['Net_Charge'] = [charge for _, charge in pairs]
+    return df
@@ -0,0 +1,82 @@
+import stat
+import sys
+
+import pandas as pd
+import pytest
+
+from microspecies import add_major_microspecies, add_molecular_details, major_microspecies
+
+# stands in for cxcalc: "majormicrospecies -H <pH> <structure or file>";
+# every call is logged, structures containing "bad" fail, and
+# STUB_NO_BATCH makes file input fail
+STUB = """#!{python}
+import os, sys
+with open(os.environ["STUB_LOG"], "a") as fh:
+    fh.write(" ".join(sys.argv[1:]) + "\\n")
+target = sys.argv[-1]
+if os.path.exists(target):
+    if os.environ.get("STUB_NO_BATCH"):
+        sys.exit(2)
+    items = open(target).read().splitlines()
+else:
+    items = [target]
+for item in items:
+    if "bad" in item:
+        sys.stderr.write("cannot read " + item + "\\n")
+        sys.exit(1)
+    print("pH" + sys.argv[3] + ":" + item)
+"""
+
+
+@pytest.fixture
+def cxcalc(tmp_path, monkeypatch):
+    path = tmp_path / "cxcalc"
+    path.write_text(STUB.format(python=sys.executable))
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    log = tmp_path / "calls.log"
+    log.write_text("")
+    monkeypatch.setenv("STUB_LOG", str(log))
+    return str(path), log
+
+
+def calls(log):
+    return log.read_text().splitlines()
+
+
+def test_single_batched_call_for_distinct_structures(cxcalc):
+    path, log = cxcalc
+    df = pd.DataFrame({'InChI': ['InChI=1S/A', 'InChI=1S/B', 'InChI=1S/A', None]})
+    add_major_microspecies(df, cxcalc=path)
+    assert list(df['MajorMicrospecies']) == ['pH7.2:InChI=1S/A', 'pH7.2:InChI=1S/B', 'pH7.2:InChI=1S/A', '']
+    assert len(calls(log)) == 1
+
+
+def test_falls_back_to_one_call_per_structure(cxcalc, monkeypatch, capsys):
+    path, log = cxcalc
+    monkeypatch.setenv("STUB_NO_BATCH", "1")
+    results = major_microspecies(['InChI=1S/A', 'InChI=1S/bad', 'InChI=1S/A'], ph=7.0, cxcalc=path, processes=2)
+    assert results == {'InChI=1S/A': 'pH7.0:InChI=1S/A', 'InChI=1S/bad': ''}
+    assert len(calls(log)) == 3
+    assert "cannot read InChI=1S/bad" in capsys.readouterr().out
+
+
+def test_failed_batch_item_does_not_lose_the_rest(cxcalc):
+    path, log = cxcalc
+    results = major_microspecies(['InChI=1S/A', 'InChI=1S/bad', 'InChI=1S/B'], cxcalc=path, processes=2)
+    assert results == {'InChI=1S/A': 'pH7.2:InChI=1S/A', 'InChI=1S/bad': '', 'InChI=1S/B': 'pH7.2:InChI=1S/B'}
+    assert len(calls(log)) == 4
+
+
+def test_missing_cxcalc_gives_empty_results(tmp_path, capsys):
+    results = major_microspecies(['InChI=1S/A', 'InChI=1S/B'], cxcalc=str(tmp_path / "no-cxcalc"), processes=1)
+    assert results == {'InChI=1S/A': '', 'InChI=1S/B': ''}
+    assert "Error executing command" in capsys.readouterr().out
+
+
+def test_molecular_details():
+    pytest.importorskip("rdkit")
+    acetate = 'InChI=1S/C2H4O2/c1-2(3)4/h1H3,(H,3,4)/p-1'
+    df = pd.DataFrame({'MajorMicrospecies': [acetate, 'not an inchi', float('nan'), acetate]})
+    add_molecular_details(df, processes=1)
+    assert list(df['Chemical_Formula']) == ['C2H3O2-', 'Invalid InChI', 'Invalid InChI', 'C2H3O2-']
+    assert list(df['Net_Charge']) == [-1, 0, 0, -1]
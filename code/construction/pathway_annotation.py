@@ -1,38 +1,29 @@
+import os
+import sys
+
 import xlrd
 import xlwt
-import requests
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "analysis"))
+from kegg_client import KeggClient, KeggError
 
-def get_pathway_name(pathway_id):
-    url = f"https://rest.kegg.jp/get/{pathway_id}"
-    response = requests.get(url)
+client = KeggClient()
 
-    if response.status_code == 200:
-        lines = response.text.strip().split("\n")
-        for line in lines:
-            if line.startswith("NAME"):
-                _, pathway_name = line.split(" ", 1)
-                return pathway_name.strip()
 
-    return "can't find"
+def get_pathway_name(pathway_id):
+    try:
+        name = client.get_name(pathway_id)
+    except KeggError:
+        name = None
+    return name or "can't find"
 
 
 def get_pathway_by_reaction(reaction_id):
-    url = f"https://rest.kegg.jp/link/pathway/{reaction_id}"
-    response = requests.get(url)
-
-    if response.status_code == 200:
-        lines = response.text.strip().split("\n")
-        pathways = []
-        for line in lines:
-            fields = line.split("\t")
-            if len(fields) >= 2:
-                _, pathway_id = fields[:2]
-                pathway_name = get_pathway_name(pathway_id)
-                pathways.append(pathway_name)
-        return pathways
-    else:
+    try:
+        pathway_ids = client.link("pathway", reaction_id)
+    except KeggError:
         return None
+    return [get_pathway_name(pathway_id) for pathway_id in pathway_ids]
 
 
 input_file = "/mnt/NFS/fengch/new/gapfill/pathwayanno.xls" 
@@ -43,9 +34,21 @@ output_file = "/mnt/NFS/fengch/new/gapfill/res.xls"
 output_workbook = xlwt.Workbook()
 output_sheet = output_workbook.add_sheet("Output")
 
-for row in range(sheet.nrows):
-    reaction_id = sheet.cell_value(row, 0)
-    pathways = get_pathway_by_reaction(reaction_id)
+reaction_ids = [sheet.cell_value(row, 0) for row in range(sheet.nrows)]
+
+
+def linked_pathways(reaction_id):
+    try:
+        return client.link("pathway", reaction_id)
+    except KeggError:
+        return []
+
+
+# pathway entries are fetched ten per request before the per-reaction lookups
+client.prefetch(sorted({p for ids in client.map(linked_pathways, reaction_ids) for p in ids}))
+all_pathways = client.map(get_pathway_by_reaction, reaction_ids)
+
+for row, (reaction_id, pathways) in enumerate(zip(reaction_ids, all_pathways)):
     if pathways:
         pathway_str = ', '.join(pathways)
         output_sheet.write(row, 0, reaction_id)
@@ -1,29 +1,10 @@
-def calculate_base_ratio(fasta_file):
-    base_counts = {}
-    total_bases = 0
-
-    with open(fasta_file, "r") as file:
-        lines = file.readlines()
-        sequence = ""
+from fasta_composition import fasta_composition, ratios
 
-        for line in lines:
-            line = line.strip()
-            if line.startswith(">"):
-                if sequence:
-                    for base in sequence:
-                        base = base.upper() 
-                        if base in base_counts:
-                            base_counts[base] += 1
-                        else:
-                            base_counts[base] = 1
-                        total_bases += 1
-                    sequence = ""
-            else:
-                sequence += line
 
-        for base, count in base_counts.items():
-            ratio = count / total_bases
-            print(f"{base}: {ratio:.6f}")
+def calculate_base_ratio(fasta_file):
+    base_counts, _ = fasta_composition(fasta_file, uppercase=True)
+    for base, ratio in ratios(base_counts).items():
+        print(f"{base}: {ratio:.6f}")
 
 fasta_file = "/mnt/NFS/fengch/H99RNA.fna"
 calculate_base_ratio(fasta_file)